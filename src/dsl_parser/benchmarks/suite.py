@@ -0,0 +1,306 @@
+# src/dsl_parser/benchmarks/suite.py
+"""
+The benchmark suite for the grammar pipeline.
+
+Run it as a module:
+
+    python -m dsl_parser.benchmarks.suite --output results.json
+    python -m dsl_parser.benchmarks.suite --compare results.json
+
+Every case records the per-stage `PipelineMetrics` of a CNFTransformer run
+(`ast_to_dict`, `binarize`, `eliminate_epsilon`, `eliminate_units`,
+`isolate_terminals`) and, where it applies, the time taken to build the
+Earley and CYK parsers and to parse a sampled sentence. Synthetic cases come
+in sweeps that vary one `synthetic_grammar` parameter at a time; for each
+sweep the suite fits the log-log slope of every stage's time against the
+grammar's size, so a stage turning super-linear shows up as an exponent
+creeping above 1. Results are written as JSON; `--compare` matches cases
+with an earlier results file and reports the stages that got slower.
+
+The Unicode case reads a local UnicodeData.txt (`--ucd` or
+`DSL_PARSER_UCD_PATH`) and is skipped without one.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..core.ast import ASTNode
+from ..grammar.bootstrap import get_bootstrap_grammar
+from ..grammar.metrics import PipelineMetrics
+from ..grammar.reader import load_grammar
+from ..grammar.transformer import CNFTransformer
+from ..parser.cyk import CYKParser
+from ..parser.earley import EarleyParser
+from .synthetic import sample_sentence, synthetic_grammar
+
+BASE_PARAMS: Dict[str, Any] = {
+    'rules': 500, 'production_length': 4, 'alternatives': 2,
+    'nullable_density': 0.1, 'unit_chain_depth': 1, 'nesting': 1,
+}
+SWEEPS: Dict[str, List[Any]] = {
+    'rules': [250, 500, 1000, 2000],
+    'production_length': [2, 4, 8, 16],
+    'nullable_density': [0.0, 0.2, 0.4, 0.8],
+    'unit_chain_depth': [0, 2, 4, 8],
+    'nesting': [0, 1, 2, 3],
+}
+# Sentence lengths for the parser cases; CYK is cubic, so it gets less text.
+EARLEY_SENTENCE = 400
+CYK_SENTENCE = 40
+# A stage slower than its baseline by more than this factor is a regression.
+DEFAULT_THRESHOLD = 1.25
+# Stages faster than this in the baseline are too noisy to compare.
+_MIN_COMPARED_TIME = 0.005
+
+# Sweeps whose largest grammar is less than this many times the smallest
+# get no scaling exponents.
+_MIN_SIZE_SPREAD = 1.5
+
+_EXAMPLES = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'examples'))
+
+
+def _timed(action: Callable[[], Any]) -> Tuple[Any, Dict[str, float]]:
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    result = action()
+    return result, {'wall_time': time.perf_counter() - wall_start,
+                    'cpu_time': time.process_time() - cpu_start}
+
+
+def run_pipeline(grammar_ast: List[ASTNode], trace_memory: bool = False) -> Tuple[CNFTransformer, Dict[str, Any]]:
+    """Runs the CNF pipeline once; returns the transformer and its stage metrics."""
+    metrics = PipelineMetrics(trace_memory=trace_memory)
+    transformer = CNFTransformer(grammar_ast, metrics)
+    transformer.transform()
+    return transformer, metrics.to_dict()
+
+
+def _parser_stages(grammar_ast: List[ASTNode], transformer: CNFTransformer, seed: int) -> List[Dict[str, Any]]:
+    """Builds both parsers on the pipeline's output and parses a sampled sentence."""
+    stages: List[Dict[str, Any]] = []
+
+    def stage(name: str, action: Callable[[], Any], **extra: Any) -> Any:
+        result, timing = _timed(action)
+        stages.append({'name': name, **timing, **extra})
+        return result
+
+    start = transformer.start_symbol
+    earley = stage('earley_build', lambda: EarleyParser.from_ast(grammar_ast, start))
+    sentence = sample_sentence(grammar_ast, EARLEY_SENTENCE, start, seed)
+    accepted = stage('earley_parse', lambda: earley.parse(sentence) is not None, length=len(sentence))
+    stages[-1]['accepted'] = accepted
+
+    cyk = stage('cyk_build', lambda: CYKParser(transformer.grammar, start, transformer.rule_names,
+                                                         transformer.unit_chains))
+    sentence = sample_sentence(grammar_ast, CYK_SENTENCE, start, seed)
+    accepted = stage('cyk_parse', lambda: cyk.parse(sentence) is not None, length=len(sentence))
+    stages[-1]['accepted'] = accepted
+    return stages
+
+
+def _case(name: str, grammar_ast: List[ASTNode], params: Dict[str, Any], repeat: int,
+          trace_memory: bool, parsers: bool, seed: int = 0) -> Dict[str, Any]:
+    """Runs one case `repeat` times and keeps the fastest run."""
+    best: Optional[Dict[str, Any]] = None
+    for _ in range(repeat):
+        transformer, metrics = run_pipeline(grammar_ast, trace_memory)
+        total = sum(stage['wall_time'] for stage in metrics['stages'])
+        if best is None or total < best['total_time']:
+            best = {'name': name, 'params': params, 'total_time': total,
+                    'stages': metrics['stages'], '_transformer': transformer}
+    assert best is not None
+    transformer = best.pop('_transformer')
+    if parsers:
+        best['stages'].extend(_parser_stages(grammar_ast, transformer, seed))
+    print(f"  {name}: {best['total_time']:.3f}s", file=sys.stderr)
+    return best
+
+
+def _unicode_case(ucd_path: str, repeat: int, trace_memory: bool) -> Dict[str, Any]:
+    """Times rule generation from a local UCD file, cold and from its range cache."""
+    # Imported here: the module also supports downloading, and needs `requests`.
+    from ..utils.unicode_rules import generate_unicode_ruleset
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cold_rules, cold = _timed(lambda: generate_unicode_ruleset('ast', ucd_path=ucd_path, cache_dir=cache_dir))
+        _, warm = _timed(lambda: generate_unicode_ruleset('ast', ucd_path=ucd_path, cache_dir=cache_dir))
+    case = _case('unicode', cold_rules, {'ucd_path': ucd_path}, repeat, trace_memory, parsers=False)
+    case['stages'][:0] = [{'name': 'generate_unicode_cold', **cold}, {'name': 'generate_unicode_cached', **warm}]
+    return case
+
+
+def _input_size(case: Dict[str, Any]) -> int:
+    """The number of symbols in the grammar right after AST conversion."""
+    return next(stage['symbols'] for stage in case['stages'] if stage['name'] == 'ast_to_dict')
+
+
+def scaling_exponents(cases: List[Dict[str, Any]]) -> Dict[str, float]:
+    """
+    Fits `time ~ size ** k` by least squares on log-log axes, per stage.
+
+    Args:
+        cases: The cases of one sweep.
+
+    Returns:
+        The exponent k for each stage that every case measured; empty if the
+        grammar size varies by less than `_MIN_SIZE_SPREAD` across the
+        sweep, where the fit would only measure noise.
+    """
+    sizes = [_input_size(case) for case in cases]
+    if not sizes or max(sizes) < _MIN_SIZE_SPREAD * min(sizes):
+        return {}
+    points: Dict[str, List[Tuple[float, float]]] = {}
+    for case in cases:
+        x = math.log(_input_size(case))
+        for stage in case['stages']:
+            if stage['wall_time'] > 0:
+                points.setdefault(stage['name'], []).append((x, math.log(stage['wall_time'])))
+    exponents: Dict[str, float] = {}
+    for name, xy in points.items():
+        if len(xy) != len(cases) or len(xy) < 2:
+            continue
+        mean_x = sum(x for x, _ in xy) / len(xy)
+        mean_y = sum(y for _, y in xy) / len(xy)
+        spread = sum((x - mean_x) ** 2 for x, _ in xy)
+        if spread:
+            exponents[name] = sum((x - mean_x) * (y - mean_y) for x, y in xy) / spread
+    return exponents
+
+
+def run_suite(repeat: int = 3, quick: bool = False, trace_memory: bool = False,
+              ucd_path: Optional[str] = None, parsers: bool = True) -> Dict[str, Any]:
+    """
+    Runs every benchmark case.
+
+    Args:
+        repeat: Runs per case; the fastest is kept.
+        quick: Use a quarter of the rules and the first three points of each sweep.
+        trace_memory: Record per-stage peak memory (slows every stage down).
+        ucd_path: A local UnicodeData.txt for the Unicode case.
+        parsers: Also benchmark the Earley and CYK parsers.
+
+    Returns:
+        The results document: run metadata, the cases, and per-sweep
+        scaling exponents.
+    """
+    cases: List[Dict[str, Any]] = []
+    scaling: Dict[str, Dict[str, float]] = {}
+
+    cases.append(_case('bootstrap', get_bootstrap_grammar(), {}, repeat, trace_memory, parsers=False))
+    example = os.path.join(_EXAMPLES, 'ebnf.ebnf')
+    if os.path.exists(example):
+        cases.append(_case('examples/ebnf.ebnf', load_grammar(example), {}, repeat, trace_memory, parsers=False))
+
+    base = dict(BASE_PARAMS)
+    if quick:
+        base['rules'] //= 4
+    for param, values in SWEEPS.items():
+        if quick:
+            values = [v // 4 for v in values[:3]] if param == 'rules' else values[:3]
+        sweep: List[Dict[str, Any]] = []
+        for value in values:
+            params = {**base, param: value}
+            # The parsers are measured along the rule-count sweep only.
+            with_parsers = parsers and param == 'rules'
+            sweep.append(_case(f"{param}={value}", synthetic_grammar(**params), params,
+                               repeat, trace_memory, with_parsers))
+        cases.extend(sweep)
+        scaling[param] = scaling_exponents(sweep)
+
+    ucd_path = ucd_path or os.environ.get("DSL_PARSER_UCD_PATH")
+    if ucd_path:
+        cases.append(_unicode_case(ucd_path, repeat, trace_memory))
+    else:
+        print("  unicode: skipped (no --ucd or DSL_PARSER_UCD_PATH)", file=sys.stderr)
+
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': repeat,
+            'quick': quick,
+            'trace_memory': trace_memory,
+        },
+        'cases': cases,
+        'scaling': scaling,
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any],
+            threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """
+    Lists the stages that got slower than in `baseline` by more than `threshold`.
+
+    Cases and stages are matched by name; stages that took under 5 ms in the
+    baseline are ignored as noise. Scaling exponents that grew by more than
+    0.25 are reported too.
+    """
+    regressions: List[str] = []
+    old_cases = {case['name']: case for case in baseline.get('cases', [])}
+    for case in results['cases']:
+        old = old_cases.get(case['name'])
+        if old is None:
+            continue
+        old_stages = {stage['name']: stage for stage in old['stages']}
+        for stage in case['stages']:
+            before = old_stages.get(stage['name'])
+            if before is None or before['wall_time'] < _MIN_COMPARED_TIME:
+                continue
+            ratio = stage['wall_time'] / before['wall_time']
+            if ratio > threshold:
+                regressions.append(f"{case['name']} / {stage['name']}: {before['wall_time']:.4f}s -> "
+                                   f"{stage['wall_time']:.4f}s ({ratio:.2f}x)")
+    for sweep, exponents in results.get('scaling', {}).items():
+        old_exponents = baseline.get('scaling', {}).get(sweep, {})
+        for stage, exponent in exponents.items():
+            before = old_exponents.get(stage)
+            if before is not None and exponent - before > 0.25:
+                regressions.append(f"scaling {sweep} / {stage}: exponent {before:.2f} -> {exponent:.2f}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks the grammar pipeline.")
+    parser.add_argument('--output', '-o', help="Write the results as JSON to this file.")
+    parser.add_argument('--compare', help="A results file to compare against; exit 1 on regressions.")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Slowdown factor counted as a regression (default %(default)s).")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per case (default %(default)s).")
+    parser.add_argument('--quick', action='store_true', help="Smaller grammars and shorter sweeps.")
+    parser.add_argument('--memory', action='store_true', help="Record peak memory with tracemalloc.")
+    parser.add_argument('--ucd', help="A local UnicodeData.txt for the Unicode case.")
+    parser.add_argument('--no-parsers', action='store_true', help="Skip the parser cases.")
+    args = parser.parse_args(argv)
+
+    results = run_suite(repeat=args.repeat, quick=args.quick, trace_memory=args.memory,
+                        ucd_path=args.ucd, parsers=not args.no_parsers)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    for sweep, exponents in results['scaling'].items():
+        summary = ", ".join(f"{stage} {k:.2f}" for stage, k in exponents.items())
+        print(f"scaling {sweep}: {summary}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
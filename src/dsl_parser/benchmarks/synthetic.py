@@ -0,0 +1,124 @@
+# src/dsl_parser/benchmarks/synthetic.py
+"""
+Parametric generators for synthetic grammars and sentences of their language.
+
+The grammars are layered: rule `R<i>` only refers to rules with a larger
+index, so every rule is productive and the language is finite-depth. Every
+rule's last alternative is made of literals only, which bounds the shortest
+derivation and lets `sample_sentence` stop expanding once it has produced
+enough text. Each scaling dimension the pipeline is sensitive to has its own
+knob:
+
+    rules              the number of `R<i>` rules
+    production_length  items per alternative (binarization, epsilon variants)
+    nullable_density   the share of rules that can derive the empty string
+    unit_chain_depth   `R<i> = R<i>_U1 ; R<i>_U1 = R<i>_U2 ; ...` chains in
+                       front of a quarter of the rules (unit elimination)
+    nesting            how deeply `[ ]` / `{ }` operators nest in an item
+"""
+import random
+from typing import Dict, List, Optional
+
+from ..core.ast import ASTNode
+
+_ALPHABET = 'abcdefghij'
+# Of the items that are not a nested operator, the share that refer to a rule.
+_REFERENCE_SHARE = 0.5
+_OPERATOR_SHARE = 0.3
+_UNIT_CHAIN_SHARE = 0.25
+
+
+def _rule(name: str, expression: ASTNode) -> ASTNode:
+    return ASTNode('Rule', children=[ASTNode('Identifier', value=name),
+                                     ASTNode('Definition', children=[expression])])
+
+
+def _sequence(items: List[ASTNode]) -> ASTNode:
+    return items[0] if len(items) == 1 else ASTNode('Sequence', children=items)
+
+
+def synthetic_grammar(rules: int = 200, production_length: int = 4, alternatives: int = 2,
+                      nullable_density: float = 0.1, unit_chain_depth: int = 0,
+                      nesting: int = 1, window: int = 8, seed: int = 0) -> List[ASTNode]:
+    """
+    Builds a layered synthetic grammar as ASTNode rules; `R0` is the start.
+
+    Args:
+        rules: The number of `R<i>` rules.
+        production_length: Items per alternative.
+        alternatives: Alternatives per rule, besides the literal-only one.
+        nullable_density: The share of rules given an all-optional alternative.
+        unit_chain_depth: The length of the unit chains put in front of a
+                          quarter of the rules; 0 for none.
+        nesting: The maximum nesting depth of Optional/Repetition items.
+        window: How far ahead (in rule indices) a rule may refer.
+        seed: The random seed; the same arguments give the same grammar.
+    """
+    rnd = random.Random(seed)
+
+    def literal() -> ASTNode:
+        return ASTNode('Literal', value=rnd.choice(_ALPHABET))
+
+    def item(index: int, depth: int) -> ASTNode:
+        if depth < nesting and rnd.random() < _OPERATOR_SHARE:
+            inner = _sequence([item(index, depth + 1) for _ in range(max(1, production_length // 2))])
+            return ASTNode(rnd.choice(('Optional', 'Repetition')), children=[inner])
+        if index + 1 < rules and rnd.random() < _REFERENCE_SHARE:
+            return ASTNode('Identifier', value=f"R{rnd.randrange(index + 1, min(rules, index + 1 + window))}")
+        return literal()
+
+    result: List[ASTNode] = []
+    for i in range(rules):
+        choices = [_sequence([item(i, 0) for _ in range(production_length)]) for _ in range(alternatives)]
+        if rnd.random() < nullable_density:
+            choices.append(ASTNode('Optional', children=[_sequence([item(i, 0) for _ in range(production_length)])]))
+        choices.append(_sequence([literal() for _ in range(max(1, production_length // 2))]))
+        body = ASTNode('Choice', children=choices)
+
+        name = f"R{i}"
+        if unit_chain_depth and rnd.random() < _UNIT_CHAIN_SHARE:
+            for k in range(1, unit_chain_depth + 1):
+                link = f"R{i}_U{k}"
+                result.append(_rule(name, ASTNode('Identifier', value=link)))
+                name = link
+        result.append(_rule(name, body))
+    return result
+
+
+def sample_sentence(grammar_ast: List[ASTNode], length: int, start: Optional[str] = None,
+                    seed: int = 0) -> str:
+    """
+    Derives a random sentence of roughly `length` characters from the grammar.
+
+    Choices are random until the text reaches `length`; from then on the
+    last alternative of each choice is taken and operators are skipped, which
+    for `synthetic_grammar` output ends the derivation quickly.
+    """
+    rnd = random.Random(seed)
+    definitions: Dict[str, ASTNode] = {r.children[0].value: r.children[1].children[0]
+                                      for r in grammar_ast if r.term_type == 'Rule'}
+    parts: List[str] = []
+    produced = 0
+    stack: List[ASTNode] = [ASTNode('Identifier', value=start or grammar_ast[0].children[0].value)]
+    while stack:
+        node = stack.pop()
+        kind = node.term_type
+        if kind == 'Literal':
+            parts.append(node.value)
+            produced += len(node.value)
+        elif kind == 'Identifier':
+            stack.append(definitions[node.value])
+        elif kind == 'Sequence':
+            stack.extend(reversed(node.children))
+        elif kind == 'Choice':
+            choose = rnd.choice if produced < length else (lambda options: options[-1])
+            stack.append(choose(node.children))
+        elif kind == 'Optional':
+            if produced < length and rnd.random() < 0.5:
+                stack.append(node.children[0])
+        elif kind == 'Repetition':
+            if produced < length:
+                stack.extend(node.children[0] for _ in range(rnd.randrange(3)))
+        else:
+            raise TypeError(f"Unsupported node type in synthetic grammar: {kind}")
+    return "".join(parts)
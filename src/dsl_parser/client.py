@@ -0,0 +1,117 @@
+# src/dsl_parser/client.py
+"""
+A thin client for the grammar daemon (see `daemon.py`).
+
+Deliberately imports nothing from the rest of the package, so starting it
+costs only the interpreter: the grammar work happens in the daemon, which
+keeps its parsers warm between calls.
+
+The protocol is one JSON object per line in each direction over a Unix
+domain socket. A request names an `op`; `validate` and `parse` also carry
+a `document` and either `grammar` (EBNF source), `grammar_path` (a file the
+daemon reads) or neither (the bootstrap grammar). Every response has `ok`,
+plus either the result fields or an `error` message.
+
+Usage:
+    python -m dsl_parser.client validate --grammar expr.ebnf a.txt b.txt
+    printf '1+2' | python -m dsl_parser.client parse --grammar expr.ebnf
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+from typing import Any, Dict, List, Optional
+
+
+def default_socket_path() -> str:
+    """The daemon's socket: `DSL_PARSER_SOCKET`, or a per-user file in the temp directory."""
+    path = os.environ.get("DSL_PARSER_SOCKET")
+    if path:
+        return path
+    return os.path.join(tempfile.gettempdir(), f"dsl-parser-{os.getuid()}.sock")
+
+
+class DaemonError(RuntimeError):
+    """The daemon answered a request with an error."""
+
+
+class DaemonClient:
+    """A connection to the daemon that can carry any number of requests."""
+    def __init__(self, socket_path: Optional[str] = None, timeout: Optional[float] = 60.0):
+        self.socket_path = socket_path or default_socket_path()
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        self._socket.connect(self.socket_path)
+        self._reader = self._socket.makefile('rb')
+
+    def call(self, op: str, **fields: Any) -> Dict[str, Any]:
+        """
+        Sends one request and waits for its response.
+
+        Raises:
+            DaemonError: If the daemon reports an error.
+            ConnectionError: If the daemon closed the connection.
+        """
+        fields['op'] = op
+        self._socket.sendall(json.dumps(fields).encode('utf-8') + b'\n')
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("The grammar daemon closed the connection")
+        response = json.loads(line)
+        if not response.get('ok'):
+            raise DaemonError(response.get('error', 'unknown error'))
+        return response
+
+    def close(self) -> None:
+        self._reader.close()
+        self._socket.close()
+
+    def __enter__(self) -> 'DaemonClient':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Runs the client command.
+
+    Returns:
+        0 if every document was accepted, 1 if any was rejected, 2 on errors.
+    """
+    parser = argparse.ArgumentParser(prog="python -m dsl_parser.client", description=__doc__.split("\n\n")[0])
+    parser.add_argument('op', choices=('validate', 'parse', 'stats', 'ping', 'shutdown'))
+    parser.add_argument('documents', nargs='*', help="Files to check; standard input if none are given.")
+    parser.add_argument('--grammar', help="The grammar file (EBNF). Defaults to the bootstrap grammar.")
+    parser.add_argument('--socket', help="The daemon's socket path.")
+    args = parser.parse_intermixed_args(argv)
+
+    try:
+        with DaemonClient(args.socket) as client:
+            if args.op not in ('validate', 'parse'):
+                print(json.dumps(client.call(args.op), indent=2))
+                return 0
+            grammar = {'grammar_path': os.path.abspath(args.grammar)} if args.grammar else {}
+            status = 0
+            for name in args.documents or ['-']:
+                if name == '-':
+                    document = sys.stdin.read()
+                else:
+                    with open(name, encoding='utf-8') as f:
+                        document = f.read()
+                response = client.call(args.op, document=document, **grammar)
+                if args.op == 'parse':
+                    print(json.dumps(response.get('tree')))
+                print(f"{name}: {'ok' if response['accepted'] else 'rejected'}", file=sys.stderr)
+                status = max(status, 0 if response['accepted'] else 1)
+            return status
+    except (OSError, DaemonError) as e:
+        print(f"dsl_parser.client: {e}", file=sys.stderr)
+        return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,138 @@
+# src/dsl_parser/core/arena.py
+"""
+An array-backed store for large parse trees.
+
+Character-level parses create one node per input character, and a
+multi-megabyte document would need millions of ASTNode objects. The arena
+stores the same tree in a few flat arrays instead: a type ID, a value slot
+and a (first child, child count) pair per node, with all child IDs in one
+shared array. Nodes are added children-first, which is the order parsers
+complete them in, so each node's children occupy one contiguous slice.
+"""
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .ast import ASTNode
+
+
+class ASTArena:
+    """A tree of nodes identified by integer IDs and stored in flat arrays."""
+    def __init__(self):
+        self.type_names: List[str] = []
+        self._type_ids: Dict[str, int] = {}
+        self.types = array('I')
+        self.values: List[Any] = []
+        self.child_start = array('I')
+        self.child_count = array('I')
+        self.child_ids = array('I')
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def type_id(self, term_type: str) -> int:
+        """Returns the dense ID of a term type, assigning one if needed."""
+        type_id = self._type_ids.get(term_type)
+        if type_id is None:
+            type_id = self._type_ids[term_type] = len(self.type_names)
+            self.type_names.append(term_type)
+        return type_id
+
+    def add(self, term_type: str, value: Any = None, children: Sequence[int] = ()) -> int:
+        """
+        Appends a node and returns its ID.
+
+        Args:
+            term_type: The node's type, as for ASTNode.
+            value: The node's direct value, if any.
+            children: IDs of nodes already in the arena, in order.
+        """
+        node_id = len(self.types)
+        self.types.append(self.type_id(term_type))
+        self.values.append(value)
+        self.child_start.append(len(self.child_ids))
+        self.child_count.append(len(children))
+        self.child_ids.extend(children)
+        return node_id
+
+    def term_type(self, node_id: int) -> str:
+        return self.type_names[self.types[node_id]]
+
+    def value(self, node_id: int) -> Any:
+        return self.values[node_id]
+
+    def children(self, node_id: int) -> Sequence[int]:
+        """Returns the child IDs of a node as a slice of the shared array."""
+        start = self.child_start[node_id]
+        return self.child_ids[start:start + self.child_count[node_id]]
+
+    def walk(self, root: int) -> Iterator[int]:
+        """Yields node IDs under `root` in pre-order."""
+        stack = [root]
+        while stack:
+            node_id = stack.pop()
+            yield node_id
+            start = self.child_start[node_id]
+            stack.extend(reversed(self.child_ids[start:start + self.child_count[node_id]]))
+
+    def flatten(self, root: int) -> str:
+        """Concatenates node values under `root`, like ASTNode.flatten."""
+        parts: List[str] = []
+        stack = [root]
+        values = self.values
+        while stack:
+            node_id = stack.pop()
+            value = values[node_id]
+            if value is not None:
+                parts.append(str(value))
+            else:
+                start = self.child_start[node_id]
+                stack.extend(reversed(self.child_ids[start:start + self.child_count[node_id]]))
+        return "".join(parts)
+
+    def to_ast(self, root: int) -> ASTNode:
+        """Materializes the subtree under `root` as ASTNode objects."""
+        built: Dict[int, ASTNode] = {}
+        stack: List[Tuple[int, bool]] = [(root, False)]
+        while stack:
+            node_id, ready = stack.pop()
+            kids = self.children(node_id)
+            if ready or not kids:
+                built[node_id] = ASTNode(self.term_type(node_id), self.values[node_id],
+                                         [built[k] for k in kids] if kids else None)
+            else:
+                stack.append((node_id, True))
+                stack.extend((k, False) for k in reversed(kids))
+        return built[root]
+
+    @classmethod
+    def from_ast(cls, root: ASTNode, arena: Optional['ASTArena'] = None) -> Tuple['ASTArena', int]:
+        """
+        Copies an ASTNode tree into an arena.
+
+        Returns:
+            The arena (a new one unless `arena` is given) and the root's ID.
+        """
+        arena = arena if arena is not None else cls()
+        ids: Dict[int, int] = {}
+        for node in root.walk_postorder():
+            ids[id(node)] = arena.add(node.term_type, node.value,
+                                      [ids[id(child)] for child in node.children])
+        return arena, ids[id(root)]
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the arrays (excluding value objects)."""
+        return sum(a.itemsize * len(a) for a in (self.types, self.child_start, self.child_count, self.child_ids)) \
+            + 8 * len(self.values)
+
+
+if __name__ == '__main__':
+    print("--- ASTArena Demonstration ---")
+    arena = ASTArena()
+    letters = [arena.add(c, value=c) for c in "rule"]
+    identifier = arena.add('Identifier', children=letters)
+    rule = arena.add('Rule', children=[identifier])
+
+    print(f"Stored {len(arena)} nodes in ~{arena.nbytes()} bytes of arrays.")
+    print(arena.to_ast(rule))
+    assert arena.flatten(rule) == "rule"
+    print("✅ Demonstration complete.")
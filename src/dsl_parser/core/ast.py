@@ -6,10 +6,13 @@ This class is the fundamental data structure used throughout the parsing process
 It represents a "Symbol" in the unified parsing model, capable of being a
 primitive (like a character) or a composite structure (like a token or rule).
 """
-from typing import Any, List, Optional
+import sys
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 class ASTNode:
     """A node in the Abstract Syntax Tree."""
+    __slots__ = ('term_type', 'value', 'children')
+
     def __init__(self, term_type: str, value: Any = None, children: Optional[List['ASTNode']] = None):
         """
         Initializes an AST node.
@@ -17,41 +20,117 @@ class ASTNode:
         Args:
             term_type: The type of the terminal or non-terminal rule this
                        node represents (e.g., 'Identifier', 'Rule', 'a').
+                       Type names are interned, since a tree repeats a
+                       handful of them across many nodes.
             value: The direct value of the node, if it's a leaf or has a simple
                    token value. Defaults to None.
             children: A list of child ASTNode objects. Defaults to an empty list.
         """
-        self.term_type: str = term_type
+        self.term_type: str = sys.intern(term_type) if type(term_type) is str else term_type
         self.value: Any = value
         self.children: List['ASTNode'] = children if children else []
 
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # Rebuilding through __init__ pickles about twice as fast (and smaller)
+        # as the generic slots protocol, which matters for trees returned by
+        # worker processes.
+        return (self.__class__, (self.term_type, self.value, self.children or None))
+
     def __repr__(self, level: int = 0) -> str:
         """Provides an indented, tree-like string representation for debugging."""
-        indent = "  " * level
-        # Display the value if it's not None
-        value_str = f", value='{self.value}'" if self.value is not None else ""
-        
-        ret = f"{indent}ASTNode(type='{self.term_type}'{value_str})\n"
-        
-        for child in self.children:
-            ret += child.__repr__(level + 1)
-        return ret
+        lines: List[str] = []
+        stack: List[Tuple['ASTNode', int]] = [(self, level)]
+        while stack:
+            node, depth = stack.pop()
+            # Display the value if it's not None
+            value_str = f", value='{node.value}'" if node.value is not None else ""
+            lines.append(f"{'  ' * depth}ASTNode(type='{node.term_type}'{value_str})\n")
+            for child in reversed(node.children):
+                stack.append((child, depth + 1))
+        return "".join(lines)
 
     def flatten(self) -> str:
         """
-        Recursively concatenates the values of this node and its children.
+        Concatenates the values of this node and its children.
 
         Useful for getting the string representation of a composite node,
-        like an Identifier composed of character nodes.
+        like an Identifier composed of character nodes. A node with a direct
+        value contributes that value and its children are not visited. The
+        traversal is iterative, so arbitrarily deep trees are fine.
 
         Returns:
             The flattened string value.
         """
-        # If the node has a direct value, use it.
-        if self.value is not None:
-            return str(self.value)
-        # Otherwise, flatten its children.
-        return "".join(child.flatten() for child in self.children)
+        parts: List[str] = []
+        stack: List['ASTNode'] = [self]
+        while stack:
+            node = stack.pop()
+            # If the node has a direct value, use it.
+            if node.value is not None:
+                parts.append(str(node.value))
+            else:
+                # Otherwise, flatten its children.
+                stack.extend(reversed(node.children))
+        return "".join(parts)
+
+    def walk(self) -> Iterator['ASTNode']:
+        """Yields this node and all of its descendants in pre-order."""
+        stack: List['ASTNode'] = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
+
+    def walk_postorder(self) -> Iterator['ASTNode']:
+        """Yields every descendant before its parent, children left to right."""
+        stack: List[Tuple['ASTNode', bool]] = [(self, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if expanded or not node.children:
+                yield node
+            else:
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(node.children))
+
+
+class ASTVisitor:
+    """
+    Base class for iterative tree visitors.
+
+    Subclasses define `enter_<term_type>(node)` and/or `leave_<term_type>(node)`
+    methods (falling back to `enter_default` / `leave_default`). Returning
+    False from an enter method skips that node's children. Dispatch targets
+    are looked up once per term type.
+    """
+    def __init__(self):
+        self._dispatch: Dict[Tuple[str, str], Callable[[ASTNode], Any]] = {}
+
+    def _handler(self, phase: str, term_type: str) -> Callable[[ASTNode], Any]:
+        key = (phase, term_type)
+        handler = self._dispatch.get(key)
+        if handler is None:
+            handler = getattr(self, f"{phase}_{term_type}", None) or getattr(self, f"{phase}_default")
+            self._dispatch[key] = handler
+        return handler
+
+    def enter_default(self, node: ASTNode) -> Any:
+        return None
+
+    def leave_default(self, node: ASTNode) -> Any:
+        return None
+
+    def visit(self, root: ASTNode) -> None:
+        """Walks the tree under `root`, calling the enter/leave hooks."""
+        stack: List[Tuple[ASTNode, bool]] = [(root, False)]
+        while stack:
+            node, leaving = stack.pop()
+            if leaving:
+                self._handler('leave', node.term_type)(node)
+                continue
+            descend = self._handler('enter', node.term_type)(node) is not False
+            stack.append((node, True))
+            if descend:
+                stack.extend((child, False) for child in reversed(node.children))
 
 if __name__ == '__main__':
     # This block demonstrates how to use the ASTNode class
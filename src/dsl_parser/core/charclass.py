@@ -0,0 +1,224 @@
+# src/dsl_parser/core/charclass.py
+"""
+Defines the character-class terminal used for Unicode and range rules.
+
+A CharClass is an immutable set of code points stored as sorted, disjoint,
+inclusive intervals. Membership is a binary search over the interval starts,
+and whole classes combine with set operations, so a category such as
+'Letter' is a single grammar symbol rather than hundreds of one-range
+productions.
+
+Inside a grammar dictionary a class is written in the W3C EBNF notation the
+transformer already uses for ranges, e.g. `[#x0041-#x005A#x0061-#x007A]`,
+and a single code point as `#x0041`.
+"""
+import re
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Tuple, Union
+
+MAX_CODE_POINT = 0x10FFFF
+
+_SINGLE_TERMINAL = re.compile(r"#x([0-9A-Fa-f]+)")
+_CLASS_TERMINAL = re.compile(r"\[((?:#x[0-9A-Fa-f]+(?:-#x[0-9A-Fa-f]+)?)+)\]")
+_CLASS_ITEM = re.compile(r"#x([0-9A-Fa-f]+)(?:-#x([0-9A-Fa-f]+))?")
+
+
+class CharClass:
+    """An immutable set of Unicode code points backed by interval arrays."""
+    __slots__ = ('_starts', '_ends', '_hash')
+
+    def __init__(self, ranges: Iterable[Tuple[int, int]] = ()):
+        """
+        Initializes a character class.
+
+        Args:
+            ranges: Inclusive (start, end) code point pairs, in any order.
+                    Overlapping and adjacent ranges are merged.
+        """
+        merged: List[List[int]] = []
+        for start, end in sorted(ranges):
+            if start > end:
+                raise ValueError(f"Invalid code point range: {start:#x}-{end:#x}")
+            if merged and merged[-1][1] + 1 >= start:
+                if end > merged[-1][1]:
+                    merged[-1][1] = end
+            else:
+                merged.append([start, end])
+        self._starts = array('I', (r[0] for r in merged))
+        self._ends = array('I', (r[1] for r in merged))
+        self._hash = 0
+
+    @classmethod
+    def _from_normalized(cls, starts: array, ends: array) -> 'CharClass':
+        """Builds a class from interval arrays that are already canonical."""
+        instance = cls.__new__(cls)
+        instance._starts = starts
+        instance._ends = ends
+        instance._hash = 0
+        return instance
+
+    @classmethod
+    def from_chars(cls, chars: str) -> 'CharClass':
+        """Builds a class containing exactly the given characters."""
+        return cls((ord(c), ord(c)) for c in chars)
+
+    @classmethod
+    def union_of(cls, classes: Iterable['CharClass']) -> 'CharClass':
+        """Returns the union of any number of classes in a single merge."""
+        return cls(r for cc in classes for r in cc)
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def parse(symbol: str) -> 'CharClass':
+        """
+        Parses the grammar-dictionary notation of a class.
+
+        Args:
+            symbol: A terminal such as '#x0041' or '[#x0041-#x005A#x005F]'.
+
+        Returns:
+            The CharClass denoted by the symbol. Results are memoized, so
+            parsers may call this once per terminal without re-parsing.
+        """
+        single = _SINGLE_TERMINAL.fullmatch(symbol)
+        if single:
+            code = int(single.group(1), 16)
+            return CharClass(((code, code),))
+        bracket = _CLASS_TERMINAL.fullmatch(symbol)
+        if not bracket:
+            raise ValueError(f"Not a character class terminal: '{symbol[:40]}'")
+        ranges = []
+        for start_hex, end_hex in _CLASS_ITEM.findall(bracket.group(1)):
+            start = int(start_hex, 16)
+            ranges.append((start, int(end_hex, 16) if end_hex else start))
+        return CharClass(ranges)
+
+    def to_terminal(self) -> str:
+        """Returns the grammar-dictionary notation of this class."""
+        if len(self._starts) == 1 and self._starts[0] == self._ends[0]:
+            return f"#x{self._starts[0]:04X}"
+        parts = []
+        for start, end in zip(self._starts, self._ends):
+            parts.append(f"#x{start:04X}" if start == end else f"#x{start:04X}-#x{end:04X}")
+        return f"[{''.join(parts)}]"
+
+    def __contains__(self, item: Union[int, str]) -> bool:
+        """Tests membership of a code point or a single character."""
+        code = ord(item) if isinstance(item, str) else item
+        i = bisect_right(self._starts, code) - 1
+        return i >= 0 and code <= self._ends[i]
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        """Yields the inclusive (start, end) intervals in ascending order."""
+        return zip(self._starts, self._ends)
+
+    def __bool__(self) -> bool:
+        return len(self._starts) > 0
+
+    @property
+    def interval_count(self) -> int:
+        """The number of disjoint intervals in the class."""
+        return len(self._starts)
+
+    @property
+    def size(self) -> int:
+        """The number of code points in the class."""
+        return sum(self._ends) - sum(self._starts) + len(self._starts)
+
+    def union(self, *others: 'CharClass') -> 'CharClass':
+        """Returns the set of code points in this class or any of `others`."""
+        return CharClass.union_of((self,) + others)
+
+    def intersection(self, other: 'CharClass') -> 'CharClass':
+        """Returns the set of code points in both classes."""
+        starts, ends = array('I'), array('I')
+        a_starts, a_ends, b_starts, b_ends = self._starts, self._ends, other._starts, other._ends
+        i = j = 0
+        while i < len(a_starts) and j < len(b_starts):
+            lo = max(a_starts[i], b_starts[j])
+            hi = min(a_ends[i], b_ends[j])
+            if lo <= hi:
+                starts.append(lo)
+                ends.append(hi)
+            if a_ends[i] < b_ends[j]:
+                i += 1
+            else:
+                j += 1
+        return CharClass._from_normalized(starts, ends)
+
+    def difference(self, other: 'CharClass') -> 'CharClass':
+        """Returns the set of code points in this class but not in `other`."""
+        starts, ends = array('I'), array('I')
+        b_starts, b_ends = other._starts, other._ends
+        j = 0
+        for start, end in zip(self._starts, self._ends):
+            # Skip subtrahend intervals that end before this one starts.
+            while j < len(b_starts) and b_ends[j] < start:
+                j += 1
+            k = j
+            while k < len(b_starts) and b_starts[k] <= end:
+                if b_starts[k] > start:
+                    starts.append(start)
+                    ends.append(b_starts[k] - 1)
+                start = b_ends[k] + 1
+                if start > end:
+                    break
+                k += 1
+            if start <= end:
+                starts.append(start)
+                ends.append(end)
+        return CharClass._from_normalized(starts, ends)
+
+    def complement(self) -> 'CharClass':
+        """Returns every code point not in this class."""
+        return CharClass(((0, MAX_CODE_POINT),)).difference(self)
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CharClass):
+            return NotImplemented
+        return self._starts == other._starts and self._ends == other._ends
+
+    def __hash__(self) -> int:
+        if not self._hash:
+            self._hash = hash((self._starts.tobytes(), self._ends.tobytes()))
+        return self._hash
+
+    def __reduce__(self):
+        return (CharClass, (list(self),))
+
+    def __str__(self) -> str:
+        return self.to_terminal()
+
+    def __repr__(self) -> str:
+        text = self.to_terminal()
+        if len(text) > 60:
+            text = f"{text[:57]}..."
+        return f"CharClass('{text}', intervals={self.interval_count})"
+
+
+def is_class_terminal(symbol: str) -> bool:
+    """Returns True if a grammar symbol uses the character-class notation."""
+    return (symbol.startswith('[#x') or symbol.startswith('#x')) and (
+        _CLASS_TERMINAL.fullmatch(symbol) is not None or _SINGLE_TERMINAL.fullmatch(symbol) is not None)
+
+
+if __name__ == '__main__':
+    print("--- CharClass Demonstration ---")
+    upper = CharClass(((0x41, 0x5A),))
+    lower = CharClass(((0x61, 0x7A),))
+    letters = upper | lower
+    print(f"Letters: {letters.to_terminal()} ({letters.size} code points)")
+
+    vowels = CharClass.from_chars("aeiouAEIOU")
+    consonants = letters - vowels
+    print(f"Consonants span {consonants.interval_count} intervals.")
+
+    assert 'b' in consonants and 'a' not in consonants
+    assert CharClass.parse(letters.to_terminal()) == letters
+    print("\n✅ Demonstration complete.")
@@ -0,0 +1,279 @@
+# src/dsl_parser/daemon.py
+"""
+A long-running grammar daemon that keeps parsers warm between requests.
+
+`main.py` pays for the Unicode load and the grammar compilation on every
+run; editor tooling and CI hooks that validate hundreds of documents a
+minute cannot. The daemon keeps one Earley parser per grammar resident,
+keyed by a hash of the grammar's source and evicted least recently used
+first, and answers requests over a Unix domain socket (see `client.py`
+for the protocol and the client command).
+
+Connections are served concurrently by an asyncio server. Only validating
+a short document happens right on the event loop, which is faster than any
+hand-off; parses (whose trees cost several times more) and longer
+documents go to a process pool whose workers keep their own parser
+registries, so only the document and the grammar source cross the process
+boundary, and each worker compiles a grammar once.
+
+Usage:
+    python -m dsl_parser.daemon [--socket PATH] [--max-grammars N] [--workers N]
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from .client import default_socket_path
+from .core.ast import ASTNode
+from .grammar.bootstrap import get_bootstrap_grammar
+from .grammar.reader import parse_ebnf, rules_of
+from .grammar.transformer import referenced_symbols
+from .parser.earley import EarleyParser
+from .utils.unicode_rules import generate_unicode_ruleset
+
+logger = logging.getLogger(__name__)
+
+# Parsers kept resident, per process.
+MAX_GRAMMARS = 8
+# Documents up to this many characters are validated on the event loop.
+# Measured on a small expression grammar, validation costs 10-30 us per
+# character and a parse with its tree 60-90 us, and heavier grammars run
+# several times that, so only short validations stay under a millisecond
+# or two; everything else would stall the other connections.
+INLINE_THRESHOLD = 128
+# Longest request line accepted, in bytes.
+MAX_REQUEST_SIZE = 64 << 20
+
+# ('text', EBNF source) or ('bootstrap', '')
+GrammarSpec = Tuple[str, str]
+
+
+def grammar_key(spec: GrammarSpec) -> str:
+    """Hashes a grammar's source; equal sources share one resident parser."""
+    return hashlib.sha256(f"{spec[0]}\x00{spec[1]}".encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+def _load_rules(spec: GrammarSpec) -> List[ASTNode]:
+    kind, source = spec
+    if kind == 'bootstrap':
+        bootstrap = get_bootstrap_grammar()
+        unicode_rules = generate_unicode_ruleset(output_format='ast', symbols=referenced_symbols(bootstrap))
+        if not isinstance(unicode_rules, list):
+            raise TypeError(f"Expected a list of ASTNodes, but got {type(unicode_rules)}")
+        return bootstrap + unicode_rules
+    return rules_of(parse_ebnf(source, source='<request>'))
+
+
+class GrammarRegistry:
+    """Resident parsers by grammar key, evicted least recently used first."""
+    def __init__(self, max_grammars: int = MAX_GRAMMARS):
+        self.max_grammars = max_grammars
+        self._parsers: 'OrderedDict[str, EarleyParser]' = OrderedDict()
+        # Guards the two dicts only; compilation holds the grammar's own lock.
+        self._lock = threading.Lock()
+        self._compiling: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str, spec: GrammarSpec) -> EarleyParser:
+        """Returns the parser for `spec`, compiling it on a miss."""
+        with self._lock:
+            parser = self._lookup(key)
+            if parser is not None:
+                return parser
+            compiling = self._compiling.setdefault(key, threading.Lock())
+        # Concurrent requests for the same new grammar wait for one
+        # compilation; requests for other grammars are not held up.
+        with compiling:
+            with self._lock:
+                parser = self._lookup(key)
+                if parser is not None:
+                    return parser
+                self.misses += 1
+            try:
+                parser = EarleyParser.from_ast(_load_rules(spec))
+            except BaseException:
+                with self._lock:
+                    self._compiling.pop(key, None)
+                raise
+            with self._lock:
+                self._compiling.pop(key, None)
+                self._parsers[key] = parser
+                while len(self._parsers) > self.max_grammars:
+                    evicted, _ = self._parsers.popitem(last=False)
+                    self.evictions += 1
+                    logger.info("Evicted grammar %s", evicted[:12])
+            return parser
+
+    def _lookup(self, key: str) -> Optional[EarleyParser]:
+        """Returns a resident parser and marks it recently used; call with the lock held."""
+        parser = self._parsers.get(key)
+        if parser is not None:
+            self._parsers.move_to_end(key)
+            self.hits += 1
+        return parser
+
+    def stats(self) -> Dict[str, Any]:
+        return {'grammars': list(self._parsers), 'hits': self.hits,
+                'misses': self.misses, 'evictions': self.evictions}
+
+
+def tree_to_json(root: ASTNode) -> List[Any]:
+    """Converts a tree to nested `[type, value, children]` lists, iteratively."""
+    result: List[Any] = [root.term_type, root.value, []]
+    stack = [(root, result)]
+    while stack:
+        node, out = stack.pop()
+        for child in node.children:
+            encoded: List[Any] = [child.term_type, child.value, []]
+            out[2].append(encoded)
+            if child.children:
+                stack.append((child, encoded))
+    return result
+
+
+def _run(parser: EarleyParser, document: str, want_tree: bool) -> Dict[str, Any]:
+    if not want_tree:
+        return {'accepted': parser.recognize(document)}
+    tree = parser.parse(document)
+    return {'accepted': tree is not None, 'tree': None if tree is None else tree_to_json(tree)}
+
+
+_worker_registry: Optional[GrammarRegistry] = None
+
+
+def _init_worker(max_grammars: int) -> None:
+    global _worker_registry
+    _worker_registry = GrammarRegistry(max_grammars)
+
+
+def _worker_parse(key: str, spec: GrammarSpec, document: str, want_tree: bool) -> Dict[str, Any]:
+    assert _worker_registry is not None, "worker was started without _init_worker"
+    return _run(_worker_registry.get(key, spec), document, want_tree)
+
+
+class GrammarDaemon:
+    """Serves parse and validate requests over a Unix domain socket."""
+    def __init__(self, socket_path: Optional[str] = None, max_grammars: int = MAX_GRAMMARS,
+                 workers: Optional[int] = None):
+        """
+        Args:
+            socket_path: Where to listen. Defaults to `default_socket_path()`.
+            max_grammars: Parsers kept resident, in the daemon and in each worker.
+            workers: Process pool size for parses and large documents.
+                     Defaults to the CPU count; 0 runs them on a thread
+                     instead, which keeps the loop serving but shares the GIL.
+        """
+        self.socket_path = socket_path or default_socket_path()
+        self.registry = GrammarRegistry(max_grammars)
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self.requests = 0
+
+    async def serve(self) -> None:
+        """Listens until a `shutdown` request arrives."""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)  # left behind by a daemon that died
+        if self.workers > 0:
+            self._pool = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                             initargs=(self.registry.max_grammars,))
+        self._stopping = asyncio.Event()
+        server = await asyncio.start_unix_server(self._handle_client, path=self.socket_path,
+                                                 limit=MAX_REQUEST_SIZE)
+        logger.info("Listening on %s", self.socket_path)
+        try:
+            async with server:
+                await self._stopping.wait()
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answers one connection's requests in order until it closes."""
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    writer.write(b'{"ok": false, "error": "request too large"}\n')
+                    break
+                if not line:
+                    break
+                try:
+                    response = await self._dispatch(json.loads(line))
+                except Exception as e:  # reported to the client, the daemon stays up
+                    response = {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+                writer.write(json.dumps(response).encode('utf-8') + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        self.requests += 1
+        op = request.get('op')
+        if op == 'ping':
+            return {'ok': True}
+        if op == 'stats':
+            return {'ok': True, 'requests': self.requests, **self.registry.stats()}
+        if op == 'shutdown':
+            assert self._stopping is not None
+            self._stopping.set()
+            return {'ok': True}
+        if op not in ('validate', 'parse'):
+            raise ValueError(f"Unknown op {op!r}")
+
+        document = request.get('document')
+        if not isinstance(document, str):
+            raise ValueError("'document' must be a string")
+        spec = self._spec(request)
+        key = grammar_key(spec)
+        loop = asyncio.get_running_loop()
+        want_tree = op == 'parse'
+        if not want_tree and len(document) <= INLINE_THRESHOLD:
+            # Compiling a new grammar is slow; keep the loop serving meanwhile.
+            parser = await loop.run_in_executor(None, self.registry.get, key, spec)
+            result = _run(parser, document, want_tree)
+        elif self._pool is None:
+            result = await loop.run_in_executor(None, self._parse, key, spec, document, want_tree)
+        else:
+            result = await loop.run_in_executor(self._pool, _worker_parse, key, spec, document, want_tree)
+        return {'ok': True, **result}
+
+    def _parse(self, key: str, spec: GrammarSpec, document: str, want_tree: bool) -> Dict[str, Any]:
+        return _run(self.registry.get(key, spec), document, want_tree)
+
+    @staticmethod
+    def _spec(request: Dict[str, Any]) -> GrammarSpec:
+        if 'grammar' in request:
+            return ('text', request['grammar'])
+        if 'grammar_path' in request:
+            with open(request['grammar_path'], encoding='utf-8') as f:
+                return ('text', f.read())
+        return ('bootstrap', '')
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m dsl_parser.daemon", description=__doc__.split("\n\n")[0])
+    parser.add_argument('--socket', help="Where to listen.")
+    parser.add_argument('--max-grammars', type=int, default=MAX_GRAMMARS, help="Parsers kept resident.")
+    parser.add_argument('--workers', type=int, help="Process pool size for parses and large documents; 0 for none.")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    asyncio.run(GrammarDaemon(args.socket, args.max_grammars, args.workers).serve())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,408 @@
+# src/dsl_parser/grammar/cache.py
+"""
+Persists transformed grammars on disk, keyed by the content of their source.
+
+The key is a structural hash of the input ASTNode rules combined with
+`TRANSFORMER_VERSION`, so an unchanged grammar maps to the same artifact on
+every run and the CNF pipeline can be skipped entirely on a cache hit.
+
+Artifacts use a flat binary layout of little-endian uint32 words that is
+read through mmap without unpickling anything:
+
+    header        magic, symbol count, head count, production word count,
+                  start symbol ID, name blob size
+    name offsets  symbol count + 1 words into the UTF-8 name blob
+    name blob     padded to a multiple of 4 bytes
+    symbol flags  one word per symbol (bit 0: a rule named in the source)
+    heads         head count words (symbol IDs)
+    head offsets  head count + 1 words into the production words
+    productions   per production: its length (plus its unit chain's length
+                  shifted left by 16), its symbol IDs, then its chain's
+"""
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import sys
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from ..core.ast import ASTNode
+from ..utils.paths import default_cache_dir
+from .analysis import GrammarAnalysis
+from .transformer import CNFTransformer, SimpleGrammar, TRANSFORMER_VERSION
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"DSLCNF\x00\x02"
+_HEADER = struct.Struct("<8s5I")
+_FLAG_RULE_NAME = 1
+_CHAIN_SHIFT = 16
+_LENGTH_MASK = (1 << _CHAIN_SHIFT) - 1
+
+UnitChains = Dict[str, Dict[Tuple[str, ...], Tuple[str, ...]]]
+
+
+def grammar_fingerprint(grammar_ast: List[ASTNode], start_symbol: Optional[str] = None,
+                        prune: bool = False) -> str:
+    """
+    Returns a stable structural hash of a list of ASTNode rules.
+
+    Every node contributes its type, its value and its child count in
+    pre-order, so any edit to the rules (or their order) changes the hash.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"transformer:{TRANSFORMER_VERSION};start:{start_symbol or ''};".encode())
+    if prune:
+        digest.update(b"prune;")
+    for rule in grammar_ast:
+        for node in rule.walk():
+            value = node.value
+            encoded = b"\x00" if value is None else b"\x01" + str(value).encode('utf-8', 'surrogatepass')
+            digest.update(node.term_type.encode('utf-8', 'surrogatepass'))
+            digest.update(encoded)
+            digest.update(len(node.children).to_bytes(4, 'little'))
+        digest.update(b"\xff")
+    return digest.hexdigest()
+
+
+def _words(values: List[int]) -> bytes:
+    """Packs unsigned ints as little-endian uint32 words."""
+    return struct.pack(f"<{len(values)}I", *values)
+
+
+def serialize_grammar(grammar: SimpleGrammar, start_symbol: str, rule_names: Set[str],
+                      unit_chains: Optional[UnitChains] = None) -> bytes:
+    """Encodes a grammar dictionary (and its unit chains) in the artifact layout described above."""
+    ids: Dict[str, int] = {}
+    names: List[str] = []
+    def intern(symbol: str) -> int:
+        if symbol not in ids:
+            ids[symbol] = len(names)
+            names.append(symbol)
+        return ids[symbol]
+
+    for head in grammar:
+        intern(head)
+    intern(start_symbol)
+    productions: List[int] = []
+    head_offsets = [0]
+    unit_chains = unit_chains or {}
+    for head, prods in grammar.items():
+        chains = unit_chains.get(head, {})
+        for prod in prods:
+            chain = chains.get(tuple(prod), ())
+            productions.append(len(prod) | len(chain) << _CHAIN_SHIFT)
+            productions.extend(intern(s) for s in prod)
+            productions.extend(intern(s) for s in chain)
+        head_offsets.append(len(productions))
+
+    blob = bytearray()
+    name_offsets = [0]
+    for name in names:
+        blob += name.encode('utf-8', 'surrogatepass')
+        name_offsets.append(len(blob))
+    blob += b"\x00" * (-len(blob) % 4)
+
+    flags = [_FLAG_RULE_NAME if name in rule_names else 0 for name in names]
+    header = _HEADER.pack(_MAGIC, len(names), len(grammar), len(productions), ids[start_symbol], len(blob))
+    return b"".join([
+        header, _words(name_offsets), bytes(blob), _words(flags),
+        _words([ids[h] for h in grammar]), _words(head_offsets), _words(productions),
+    ])
+
+
+class CompiledGrammar:
+    """A transformed grammar backed by a memory-mapped artifact."""
+    def __init__(self, path: str):
+        """
+        Maps an artifact file.
+
+        Raises:
+            ValueError: If the file is not a compiled grammar of this version,
+                        or is truncated.
+        """
+        self.path: Optional[str] = path
+        with open(path, 'rb') as f:
+            self._load(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'CompiledGrammar':
+        """
+        Loads an artifact held in memory, such as `serialize_grammar` returns.
+
+        The result has no `path`; `to_bytes()` recovers the artifact for
+        code that must hand it to another process.
+        """
+        compiled = cls.__new__(cls)
+        compiled.path = None
+        mapping = mmap.mmap(-1, max(len(data), 1))
+        mapping.write(data)
+        compiled._load(mapping, len(data))
+        return compiled
+
+    def _load(self, mapping: mmap.mmap, size: Optional[int] = None) -> None:
+        """Validates an artifact's layout and takes views of its sections."""
+        path = self.path or '<memory>'
+        self._mmap = mapping
+        self._size = len(mapping) if size is None else size
+        if self._size < _HEADER.size:
+            self._mmap.close()
+            raise ValueError(f"'{path}' is truncated")
+        magic, n_symbols, n_heads, n_words, start_id, blob_size = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC:
+            self._mmap.close()
+            raise ValueError(f"'{path}' is not a compiled grammar artifact")
+
+        # Checked before any view is taken, so a partly written or cut-off
+        # file is rejected instead of failing (or half-loading) later.
+        expected = _HEADER.size + blob_size + 4 * ((n_symbols + 1) + n_symbols + n_heads + (n_heads + 1) + n_words)
+        if self._size != expected or start_id >= n_symbols:
+            self._mmap.close()
+            raise ValueError(f"'{path}' is truncated or corrupt: {self._size} bytes, expected {expected}")
+
+        if sys.byteorder != 'little':
+            # The views below reinterpret the file's words in native byte order.
+            self._mmap.close()
+            raise ValueError("Compiled grammar artifacts require a little-endian host")
+
+        view = memoryview(self._mmap)
+        offset = _HEADER.size
+        def take_words(count: int) -> memoryview:
+            nonlocal offset
+            words = view[offset:offset + 4 * count].cast('I')
+            offset += 4 * count
+            return words
+
+        self._name_offsets = take_words(n_symbols + 1)
+        self._names = view[offset:offset + blob_size]
+        offset += blob_size
+        self.flags = take_words(n_symbols)
+        self.heads = take_words(n_heads)
+        self.head_offsets = take_words(n_heads + 1)
+        self.productions = take_words(n_words)
+        self._start_id = start_id
+        self._symbol_cache: Dict[int, str] = {}
+        self._analysis: Optional[GrammarAnalysis] = None
+
+    def to_bytes(self) -> bytes:
+        """Returns the artifact's contents."""
+        return self._mmap[:self._size]
+
+    def symbol(self, symbol_id: int) -> str:
+        """Decodes the name of a symbol ID."""
+        name = self._symbol_cache.get(symbol_id)
+        if name is None:
+            start, end = self._name_offsets[symbol_id], self._name_offsets[symbol_id + 1]
+            name = self._symbol_cache[symbol_id] = bytes(self._names[start:end]).decode('utf-8', 'surrogatepass')
+        return name
+
+    @property
+    def start_symbol(self) -> str:
+        return self.symbol(self._start_id)
+
+    @property
+    def rule_names(self) -> Set[str]:
+        """The rules written in the source grammar (as opposed to helpers)."""
+        return {self.symbol(i) for i, flag in enumerate(self.flags) if flag & _FLAG_RULE_NAME}
+
+    def to_dict(self) -> SimpleGrammar:
+        """Decodes the artifact back into a grammar dictionary."""
+        grammar: SimpleGrammar = {}
+        productions = self.productions
+        symbol = self.symbol
+        for h, head_id in enumerate(self.heads):
+            prods: List[List[str]] = []
+            pos, end = self.head_offsets[h], self.head_offsets[h + 1]
+            while pos < end:
+                length = productions[pos] & _LENGTH_MASK
+                prods.append([symbol(s) for s in productions[pos + 1:pos + 1 + length]])
+                pos += 1 + length + (productions[pos] >> _CHAIN_SHIFT)
+            grammar[symbol(head_id)] = prods
+        return grammar
+
+    def unit_chains(self) -> UnitChains:
+        """Decodes the unit chains stored with the productions; see `CNFTransformer.unit_chains`."""
+        chains: UnitChains = {}
+        productions = self.productions
+        symbol = self.symbol
+        for h, head_id in enumerate(self.heads):
+            pos, end = self.head_offsets[h], self.head_offsets[h + 1]
+            while pos < end:
+                length, chain_length = productions[pos] & _LENGTH_MASK, productions[pos] >> _CHAIN_SHIFT
+                if chain_length:
+                    prod = tuple(symbol(s) for s in productions[pos + 1:pos + 1 + length])
+                    chain_start = pos + 1 + length
+                    chains.setdefault(symbol(head_id), {})[prod] = tuple(
+                        symbol(s) for s in productions[chain_start:chain_start + chain_length])
+                pos += 1 + length + chain_length
+        return chains
+
+    def analysis(self) -> GrammarAnalysis:
+        """
+        Returns the grammar's FIRST/FOLLOW sets and prediction tables.
+
+        Computed on first use and kept for the life of this object, so every
+        parser built from one loaded artifact shares a single analysis.
+        """
+        if self._analysis is None:
+            self._analysis = GrammarAnalysis.from_grammar(self.to_dict(), self.start_symbol)
+        return self._analysis
+
+    def close(self) -> None:
+        """Releases the mapping; the object must not be used afterwards."""
+        for attr in ('_name_offsets', 'flags', 'heads', 'head_offsets', 'productions'):
+            getattr(self, attr).release()
+        self._names.release()
+        self._mmap.close()
+
+
+class GrammarCache:
+    """A directory of compiled-grammar artifacts, one file per fingerprint."""
+    def __init__(self, directory: Optional[str] = None):
+        """
+        Args:
+            directory: Where artifacts live. Defaults to `DSL_PARSER_CACHE_DIR`
+                       (or `~/.cache/dsl_parser`) plus `/grammars`.
+        """
+        self.directory = directory or default_cache_dir("grammars")
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.cnf")
+
+    def load(self, key: str) -> Optional[CompiledGrammar]:
+        """Returns the artifact for `key`, or None on a miss or a corrupt file."""
+        path = self.path_for(key)
+        try:
+            compiled = CompiledGrammar(path)
+        except (OSError, ValueError, struct.error):
+            return None
+        try:
+            # Record the use so eviction can drop the least recently used entries.
+            os.utime(path)
+        except OSError:
+            pass
+        return compiled
+
+    def store(self, key: str, grammar: SimpleGrammar, start_symbol: str, rule_names: Set[str],
+              unit_chains: Optional[UnitChains] = None) -> str:
+        """Atomically writes an artifact and returns its path."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path_for(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(serialize_grammar(grammar, start_symbol, rule_names, unit_chains))
+        os.replace(tmp_path, path)
+        return path
+
+    def invalidate(self, key: str) -> bool:
+        """Deletes the artifact for `key`; returns True if one existed."""
+        try:
+            os.remove(self.path_for(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def entries(self) -> List[str]:
+        """Returns the artifact paths, least recently used first."""
+        try:
+            names = [n for n in os.listdir(self.directory) if n.endswith('.cnf')]
+        except FileNotFoundError:
+            return []
+        paths = [os.path.join(self.directory, n) for n in names]
+        return sorted(paths, key=lambda p: os.stat(p).st_mtime)
+
+    def evict(self, max_entries: Optional[int] = None, max_age: Optional[float] = None) -> int:
+        """
+        Removes old artifacts.
+
+        Args:
+            max_entries: Keep at most this many, dropping the least recently used.
+            max_age: Drop artifacts unused for more than this many seconds.
+
+        Returns:
+            The number of artifacts removed.
+        """
+        paths = self.entries()
+        doomed: List[str] = []
+        if max_age is not None:
+            cutoff = time.time() - max_age
+            doomed = [p for p in paths if os.stat(p).st_mtime < cutoff]
+            paths = [p for p in paths if p not in doomed]
+        if max_entries is not None and len(paths) > max_entries:
+            doomed += paths[:len(paths) - max_entries]
+        for path in doomed:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        return len(doomed)
+
+    def clear(self) -> int:
+        """Removes every artifact; returns how many were removed."""
+        return self.evict(max_entries=0)
+
+
+def compile_grammar(grammar_ast: List[ASTNode], cache: Optional[GrammarCache] = None,
+                    start_symbol: Optional[str] = None, prune: bool = False) -> CompiledGrammar:
+    """
+    Returns the CNF form of `grammar_ast`, transforming it only on a cache miss.
+
+    If the artifact cannot be written (or read back), the result is held in
+    memory instead, with no `path`.
+
+    Args:
+        grammar_ast: The combined ASTNode rules.
+        cache: The artifact cache to consult. Defaults to `GrammarCache()`.
+        start_symbol: Overrides the transformer's default (the first rule).
+        prune: Drop unreachable and unproductive rules first; see `CNFTransformer`.
+    """
+    cache = cache or GrammarCache()
+    key = grammar_fingerprint(grammar_ast, start_symbol, prune)
+    compiled = cache.load(key)
+    if compiled is not None:
+        return compiled
+
+    transformer = CNFTransformer(grammar_ast, start_symbol=start_symbol, prune=prune)
+    cnf_grammar = transformer.transform()
+    try:
+        cache.store(key, cnf_grammar, transformer.start_symbol, transformer.rule_names, transformer.unit_chains)
+    except OSError as e:
+        # A read-only or full cache directory costs the next run a
+        # transformation, not this one its result.
+        logger.warning("Could not cache compiled grammar in '%s': %s", cache.directory, e)
+    else:
+        compiled = cache.load(key)
+        if compiled is not None:
+            return compiled
+        logger.warning("Could not read back compiled grammar '%s'", cache.path_for(key))
+    return CompiledGrammar.from_bytes(serialize_grammar(
+        cnf_grammar, transformer.start_symbol, transformer.rule_names, transformer.unit_chains))
+
+
+if __name__ == '__main__':
+    print("--- Compiled Grammar Cache Demonstration ---")
+    import tempfile
+    from .bootstrap import get_bootstrap_grammar
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = GrammarCache(tmp)
+        rules = get_bootstrap_grammar()
+
+        started = time.perf_counter()
+        compiled = compile_grammar(rules, cache)
+        print(f"Cold compile: {time.perf_counter() - started:.4f}s -> {compiled.path}")
+
+        started = time.perf_counter()
+        warm = compile_grammar(rules, cache)
+        print(f"Warm load:    {time.perf_counter() - started:.4f}s")
+
+        assert warm.to_dict() == compiled.to_dict()
+        transformer = CNFTransformer(rules)
+        transformer.transform()
+        assert warm.unit_chains() == transformer.unit_chains
+        print(f"Entries: {len(cache.entries())}, evicted: {cache.clear()}")
+        compiled.close()
+        warm.close()
+    print("\n✅ Demonstration complete.")
@@ -0,0 +1,417 @@
+# src/dsl_parser/grammar/codegen.py
+"""
+Generates standalone Python parser modules from CNF grammars.
+
+A generated module needs nothing but the standard library. It holds the
+grammar already compiled to the integer tables `CYKParser` builds at
+construction time (binary rules grouped by left child, bitsets of heads per
+terminal), with every character class merged into one sorted table of
+code-point boundaries, so matching the classes at a position is a single
+`bisect` (or a tuple index for ASCII) instead of a test per class. A small
+CYK runtime follows the tables.
+
+Importing such a module does no grammar work at all: no Unicode data is
+loaded, no rules are built or transformed, and the tables are literals the
+bytecode cache stores in their final form.
+
+Usage:
+    python -m dsl_parser.grammar.codegen GRAMMAR.ebnf OUTPUT.py
+"""
+import os
+import sys
+import time
+from bisect import bisect_right
+from typing import Dict, List, Optional, Set, Tuple
+
+from ..core.ast import ASTNode
+from ..core.charclass import CharClass, is_class_terminal
+from .cache import GrammarCache, UnitChains, compile_grammar, grammar_fingerprint
+from .transformer import SimpleGrammar, TRANSFORMER_VERSION
+
+# The parsing half of every generated module. It reads the tables emitted
+# above it and mirrors CYKParser's fill and tree recovery.
+_RUNTIME = '''
+
+class Node:
+    """A parse tree node with the fields of dsl_parser's ASTNode."""
+    __slots__ = ('term_type', 'value', 'children')
+
+    def __init__(self, term_type, value=None, children=None):
+        self.term_type = term_type
+        self.value = value
+        self.children = children if children is not None else []
+
+    def flatten(self):
+        """Concatenates the values under this node, iteratively."""
+        parts = []
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node.value is not None:
+                parts.append(str(node.value))
+            else:
+                stack.extend(reversed(node.children))
+        return "".join(parts)
+
+    def __repr__(self):
+        lines = []
+        stack = [(self, 0)]
+        while stack:
+            node, depth = stack.pop()
+            value = f", value='{node.value}'" if node.value is not None else ""
+            lines.append(f"{'  ' * depth}Node(type='{node.term_type}'{value})\\n")
+            stack.extend((child, depth + 1) for child in reversed(node.children))
+        return "".join(lines)
+
+
+def _bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _class_heads(char):
+    """Heads of the one-character terminal rules matching `char`."""
+    code = ord(char)
+    if code < 128:
+        return _ASCII_HEADS[code]
+    return _SEGMENT_HEADS[bisect_right(_SEGMENT_STARTS, code) - 1] | _CHAR_HEADS.get(char, 0)
+
+
+def _combine(left, right):
+    result = 0
+    for b in _bits(left & _LEFT_MASK):
+        candidates = right & _RIGHT_MASKS[b]
+        if candidates:
+            row = _BINARY[b]
+            for c in _bits(candidates):
+                result |= row[c]
+    return result
+
+
+def _fill_chart(text):
+    n = len(text)
+    chart = [{} for _ in range(n + 1)]
+    ends = [[] for _ in range(n + 1)]
+    combined = {}
+    seeds = [{} for _ in range(n + 1)]
+    for i, char in enumerate(text):
+        heads = _class_heads(char)
+        if heads:
+            seeds[i][i + 1] = heads
+        for literal, heads in _LITERALS.get(char, ()):
+            if text.startswith(literal, i):
+                end = i + len(literal)
+                seeds[i][end] = seeds[i].get(end, 0) | heads
+    for j in range(1, n + 1):
+        for i in range(j - 1, -1, -1):
+            cell = seeds[i].get(j, 0)
+            row = chart[i]
+            for k in ends[i]:
+                right = chart[k].get(j)
+                if not right:
+                    continue
+                pair = (row[k], right)
+                heads = combined.get(pair)
+                if heads is None:
+                    heads = combined[pair] = _combine(row[k], right)
+                cell |= heads
+            if cell:
+                row[j] = cell
+                ends[i].append(j)
+    return chart
+
+
+def recognize(text):
+    """Returns True if the start symbol derives `text`."""
+    if not text:
+        return False
+    return bool(_fill_chart(text)[0].get(len(text), 0) >> START & 1)
+
+
+def _terminal_at(symbol, text, i, j):
+    """The terminal of a rule `symbol -> terminal` matching text[i:j], or None."""
+    for terminal in _TERMINAL_RULES.get(symbol, ()):
+        ranges = _CLASS_RANGES.get(terminal)
+        if ranges is not None:
+            if j == i + 1:
+                starts, ends = ranges
+                k = bisect_right(starts, ord(text[i])) - 1
+                if k >= 0 and ord(text[i]) <= ends[k]:
+                    return terminal
+        elif text.startswith(TERMINALS[terminal], i) and i + len(TERMINALS[terminal]) == j:
+            return terminal
+    return None
+
+
+def parse(text):
+    """Parses `text`; returns the root Node, or None if it is not in the language."""
+    if not text:
+        return None
+    chart = _fill_chart(text)
+    if not chart[0].get(len(text), 0) >> START & 1:
+        return None
+    root = Node(NONTERMINALS[START])
+    stack = [(START, 0, len(text), root.children, True)]
+    while stack:
+        symbol, i, j, target, is_root = stack.pop()
+        node = None
+        if is_root:
+            node = root
+        elif _KEEP >> symbol & 1:
+            node = Node(NONTERMINALS[symbol])
+            target.append(node)
+        terminal = _terminal_at(symbol, text, i, j)
+        if terminal is not None:
+            node, target = _open_chain(_UNIT_CHAINS.get((symbol, terminal)), node, target)
+            if node is not None:
+                node.value = text[i:j]
+            else:
+                target.append(Node(TERMINALS[terminal], text[i:j]))
+            continue
+        bit = 1 << symbol
+        for k, left in chart[i].items():
+            right = chart[k].get(j, 0) if k < j else 0
+            if not right:
+                continue
+            split = None
+            for b in _bits(left & _LEFT_MASK):
+                for c, heads in _BINARY[b].items():
+                    if heads & bit and right >> c & 1:
+                        split = (b, c)
+                        break
+                if split:
+                    break
+            if split:
+                node, target = _open_chain(_UNIT_CHAINS.get((symbol,) + split), node, target)
+                children = node.children if node is not None else target
+                stack.append((split[1], k, j, children, False))
+                stack.append((split[0], i, k, children, False))
+                break
+        else:
+            raise RuntimeError(f"No derivation for {NONTERMINALS[symbol]} over [{i}, {j})")
+    return root
+
+
+def _open_chain(chain, node, target):
+    """Adds the nodes of the rules a production was inlined from; returns the innermost."""
+    for symbol in chain or ():
+        if _KEEP >> symbol & 1:
+            child = Node(NONTERMINALS[symbol])
+            (node.children if node is not None else target).append(child)
+            node = child
+    return node, target
+'''
+
+
+def _class_segments(classes: List[Tuple[CharClass, int]]) -> Tuple[List[int], List[int]]:
+    """
+    Merges classes into one partition of the code points.
+
+    Returns:
+        Sorted segment starts (the first is 0) and, per segment, the OR of
+        the head bitsets of every class that contains it.
+    """
+    boundaries = {0}
+    for char_class, _ in classes:
+        for start, end in char_class:
+            boundaries.add(start)
+            boundaries.add(end + 1)
+    starts = sorted(boundaries)
+    heads = [0] * len(starts)
+    for char_class, bits in classes:
+        for start, end in char_class:
+            first = bisect_right(starts, start) - 1
+            last = bisect_right(starts, end) - 1
+            for k in range(first, last + 1):
+                heads[k] |= bits
+    return starts, heads
+
+
+def generate_module(grammar: SimpleGrammar, start_symbol: str, rule_names: Optional[Set[str]] = None,
+                    source: str = '', unit_chains: Optional[UnitChains] = None) -> str:
+    """
+    Emits the source of a standalone parser module for a CNF grammar.
+
+    Args:
+        grammar: A CNF grammar, as returned by `CNFTransformer.transform()`.
+        start_symbol: The nonterminal a complete parse must derive.
+        rule_names: Nonterminals kept as nodes in parse trees; the others are
+                    spliced into their parent. Defaults to keeping all.
+        source: A note on where the grammar came from, for the header.
+        unit_chains: The source rules each production was inlined from, as
+                     `CNFTransformer.unit_chains` returns them.
+
+    Raises:
+        ValueError: If a production is not of the form `A -> a` or `A -> B C`,
+                    or the start symbol has no rules.
+    """
+    nonterminals = list(grammar)
+    index = {name: i for i, name in enumerate(nonterminals)}
+    if start_symbol not in index:
+        raise ValueError(f"Start symbol '{start_symbol}' has no rules")
+
+    terminals: List[str] = []
+    terminal_ids: Dict[str, int] = {}
+    terminal_heads: Dict[int, int] = {}
+    terminal_rules: Dict[int, List[int]] = {}
+    binary: Dict[int, Dict[int, int]] = {}
+    for head, productions in grammar.items():
+        h = index[head]
+        for prod in productions:
+            if len(prod) == 1 and prod[0] not in index:
+                t = terminal_ids.get(prod[0])
+                if t is None:
+                    t = terminal_ids[prod[0]] = len(terminals)
+                    terminals.append(prod[0])
+                terminal_heads[t] = terminal_heads.get(t, 0) | 1 << h
+                terminal_rules.setdefault(h, []).append(t)
+            elif len(prod) == 2 and prod[0] in index and prod[1] in index:
+                row = binary.setdefault(index[prod[0]], {})
+                c = index[prod[1]]
+                row[c] = row.get(c, 0) | 1 << h
+            else:
+                raise ValueError(f"Production {head} -> {prod} is not in Chomsky Normal Form")
+
+    classes: List[Tuple[CharClass, int]] = []
+    class_ranges: Dict[int, Tuple[Tuple[int, ...], Tuple[int, ...]]] = {}
+    char_heads: Dict[str, int] = {}
+    literals: Dict[str, List[Tuple[str, int]]] = {}
+    for t, name in enumerate(terminals):
+        if is_class_terminal(name):
+            char_class = CharClass.parse(name)
+            classes.append((char_class, terminal_heads[t]))
+            pairs = list(char_class)
+            class_ranges[t] = (tuple(s for s, _ in pairs), tuple(e for _, e in pairs))
+        elif len(name) == 1:
+            char_heads[name] = char_heads.get(name, 0) | terminal_heads[t]
+        elif name:
+            literals.setdefault(name[0], []).append((name, terminal_heads[t]))
+    segment_starts, segment_heads = _class_segments(classes)
+    ascii_heads = [segment_heads[bisect_right(segment_starts, code) - 1] | char_heads.get(chr(code), 0)
+                   for code in range(128)]
+
+    # Keyed like the runtime's choices: (head, terminal) or (head, B, C).
+    chains: Dict[Tuple[int, ...], Tuple[int, ...]] = {}
+    for head, by_production in (unit_chains or {}).items():
+        for prod, chain in by_production.items():
+            if head not in index or not all(name in index for name in chain):
+                continue
+            if len(prod) == 1 and prod[0] in terminal_ids:
+                chains[(index[head], terminal_ids[prod[0]])] = tuple(index[name] for name in chain)
+            elif len(prod) == 2 and prod[0] in index and prod[1] in index:
+                chains[(index[head], index[prod[0]], index[prod[1]])] = tuple(index[name] for name in chain)
+
+    right_masks = {b: sum(1 << c for c in row) for b, row in binary.items()}
+    keep = 0
+    for name, i in index.items():
+        if rule_names is None or name in rule_names:
+            keep |= 1 << i
+
+    tables = [
+        ("NONTERMINALS", tuple(nonterminals)),
+        ("START", index[start_symbol]),
+        ("TERMINALS", tuple(terminals)),
+        ("_KEEP", keep),
+        ("_TERMINAL_RULES", {h: tuple(ts) for h, ts in terminal_rules.items()}),
+        ("_CLASS_RANGES", class_ranges),
+        ("_CHAR_HEADS", char_heads),
+        ("_LITERALS", {first: tuple(group) for first, group in literals.items()}),
+        ("_SEGMENT_STARTS", tuple(segment_starts)),
+        ("_SEGMENT_HEADS", tuple(segment_heads)),
+        ("_ASCII_HEADS", tuple(ascii_heads)),
+        ("_BINARY", binary),
+        ("_LEFT_MASK", sum(1 << b for b in binary)),
+        ("_RIGHT_MASKS", right_masks),
+        ("_UNIT_CHAINS", chains),
+    ]
+    header = [
+        "# Generated by dsl_parser.grammar.codegen; do not edit.",
+        f"# Source: {source or 'grammar dictionary'}; transformer version {TRANSFORMER_VERSION}.",
+        f'"""A standalone CYK parser for \'{start_symbol}\': `recognize(text)` and `parse(text)`."""',
+        "from bisect import bisect_right",
+        "",
+    ]
+    body = [f"{name} = {value!r}" for name, value in tables]
+    return "\n".join(header + body) + "\n" + _RUNTIME
+
+
+def compile_to_module(grammar_ast: List[ASTNode], path: str, cache: Optional[GrammarCache] = None,
+                      start_symbol: Optional[str] = None, prune: bool = True) -> str:
+    """
+    Transforms `grammar_ast` (through the artifact cache) and writes a parser module.
+
+    Returns:
+        The path written.
+    """
+    compiled = compile_grammar(grammar_ast, cache, start_symbol=start_symbol, prune=prune)
+    try:
+        source = generate_module(compiled.to_dict(), compiled.start_symbol, compiled.rule_names,
+                                 source=f"fingerprint {grammar_fingerprint(grammar_ast, start_symbol, prune)[:16]}",
+                                 unit_chains=compiled.unit_chains())
+    finally:
+        compiled.close()
+    # Written beside the target and renamed, so an importer never sees half a module.
+    partial = f"{path}.{os.getpid()}.tmp"
+    with open(partial, 'w', encoding='utf-8') as f:
+        f.write(source)
+    os.replace(partial, path)
+    return path
+
+
+if __name__ == '__main__':
+    from .reader import load_grammar
+    if len(sys.argv) == 3:
+        print(compile_to_module(load_grammar(sys.argv[1]), sys.argv[2]))
+        sys.exit(0)
+
+    print("--- Parser Code Generation Demonstration ---")
+    import importlib.util
+    import random
+    import subprocess
+    import tempfile
+    from ..parser.cyk import CYKParser
+    from .reader import parse_ebnf, rules_of
+    from .transformer import CNFTransformer
+
+    rules = rules_of(parse_ebnf("""
+        Expr = Term, { ( '+' | '-' ), Term } ;
+        Term = Factor, { ( '*' | '/' | '**' ), Factor } ;
+        Factor = Number | Name | '(', Expr, ')' ;
+        Number = Digit, { Digit } ;
+        Name = Letter, { Letter | Digit } ;
+    """))
+    # The reader has no class syntax; classes come in as ASTNodes, as from unicode_rules.
+    for name, ranges in (('Digit', [(0x30, 0x39)]), ('Letter', [(0x41, 0x5A), (0x61, 0x7A), (0xC0, 0x24F)])):
+        rules.append(ASTNode('Rule', children=[
+            ASTNode('Identifier', value=name),
+            ASTNode('Definition', children=[ASTNode('CharClass', value=CharClass(ranges))])]))
+    transformer = CNFTransformer(rules)
+    reference = CYKParser(transformer.transform(), transformer.start_symbol, transformer.rule_names,
+                          transformer.unit_chains)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = compile_to_module(rules, os.path.join(tmp, 'expr_parser.py'), GrammarCache(tmp))
+        print(f"Wrote {path} ({os.path.getsize(path)} bytes)")
+        spec = importlib.util.spec_from_file_location('expr_parser', path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+        rng = random.Random(3)
+        alphabet = "0123456789+-*/()xyzé"
+        for _ in range(500):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randrange(1, 9)))
+            assert module.recognize(text) == reference.recognize(text), text
+            tree = module.parse(text)
+            expected = reference.parse(text)
+            assert (tree is None) == (expected is None), text
+            if tree is not None:
+                assert tree.flatten() == text and repr(tree).replace('Node(', 'ASTNode(') == repr(expected)
+        print(module.parse("x1*(2+yé)"))
+
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-c', f"import sys; sys.path.insert(0, {tmp!r}); import expr_parser"],
+                       check=True)
+        print(f"Cold start of a fresh interpreter importing it: {time.perf_counter() - started:.3f}s")
+    print("\n✅ Demonstration complete.")
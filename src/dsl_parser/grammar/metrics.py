@@ -0,0 +1,128 @@
+# src/dsl_parser/grammar/metrics.py
+"""
+Per-stage instrumentation for the grammar pipeline.
+
+Pass a `PipelineMetrics` to `CNFTransformer` to record, for every stage it
+runs (`ast_to_dict`, `binarize`, `eliminate_epsilon`, `eliminate_units`,
+`isolate_terminals`, `minimize`), the wall and CPU time, the grammar size afterwards, the
+number of fresh nonterminals the stage created and any stage-specific
+counters (e.g. nullable symbols and expanded combinations for epsilon
+elimination). Peak memory is measured with tracemalloc when requested, since
+tracing slows Python allocation down considerably.
+
+Without a metrics object the transformer skips all of this; its progress
+messages go to the `dsl_parser.grammar.transformer` logger, which is silent
+unless the application configures logging.
+"""
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .symbols import IntGrammar
+
+
+class StageMetrics:
+    """The measurements of one pipeline stage."""
+    def __init__(self, name: str):
+        self.name = name
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        # Bytes allocated at the stage's peak beyond what was live when it
+        # started; None unless memory tracing is on.
+        self.peak_memory: Optional[int] = None
+        self.nonterminals = 0
+        self.productions = 0
+        self.symbols = 0
+        self.fresh_nonterminals = 0
+        # Stage-specific counters, e.g. {'nullable': 12, 'combinations': 340}.
+        self.counters: Dict[str, int] = {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'wall_time': self.wall_time,
+            'cpu_time': self.cpu_time,
+            'peak_memory': self.peak_memory,
+            'nonterminals': self.nonterminals,
+            'productions': self.productions,
+            'symbols': self.symbols,
+            'fresh_nonterminals': self.fresh_nonterminals,
+            'counters': dict(self.counters),
+        }
+
+    def __repr__(self) -> str:
+        memory = f", peak={self.peak_memory}B" if self.peak_memory is not None else ""
+        return (f"StageMetrics({self.name!r}, wall={self.wall_time:.4f}s, cpu={self.cpu_time:.4f}s{memory}, "
+                f"nonterminals={self.nonterminals}, productions={self.productions})")
+
+
+class PipelineMetrics:
+    """Collects `StageMetrics` for the stages of one or more pipeline runs."""
+    def __init__(self, trace_memory: bool = False,
+                 on_stage: Optional[Callable[[StageMetrics], None]] = None):
+        """
+        Args:
+            trace_memory: Measure each stage's peak memory with tracemalloc.
+                          Tracing is started for the stage if it is not on
+                          already, and stopped again afterwards.
+            on_stage: Called with each stage's metrics as soon as it ends.
+        """
+        self.trace_memory = trace_memory
+        self.on_stage = on_stage
+        self.stages: List[StageMetrics] = []
+        self._current: Optional[StageMetrics] = None
+
+    @contextmanager
+    def stage(self, name: str, grammar: Callable[[], IntGrammar],
+              fresh: Callable[[], int]) -> Iterator[StageMetrics]:
+        """
+        Measures the block as one stage.
+
+        Args:
+            name: The stage name.
+            grammar: Returns the grammar to size once the stage is over.
+            fresh: Returns the running count of generated nonterminals.
+        """
+        metrics = StageMetrics(name)
+        self._current = metrics
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        fresh_before = fresh()
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        try:
+            yield metrics
+        finally:
+            metrics.wall_time = time.perf_counter() - wall_start
+            metrics.cpu_time = time.process_time() - cpu_start
+            if self.trace_memory:
+                metrics.peak_memory = tracemalloc.get_traced_memory()[1] - baseline
+                if started_tracing:
+                    tracemalloc.stop()
+            self._current = None
+        metrics.fresh_nonterminals = fresh() - fresh_before
+        sized = grammar()
+        metrics.nonterminals = len(sized)
+        metrics.productions = sum(len(prods) for prods in sized.values())
+        metrics.symbols = sum(len(prod) for prods in sized.values() for prod in prods)
+        self.stages.append(metrics)
+        if self.on_stage is not None:
+            self.on_stage(metrics)
+
+    def count(self, counter: str, value: int) -> None:
+        """Adds to a counter of the stage being measured; ignored between stages."""
+        if self._current is not None:
+            self._current.counters[counter] = self._current.counters.get(counter, 0) + value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'stages': [stage.to_dict() for stage in self.stages]}
+
+    def write_json(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
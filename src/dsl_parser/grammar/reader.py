@@ -0,0 +1,482 @@
+# src/dsl_parser/grammar/reader.py
+"""
+Reads EBNF grammar text into ASTNode rule lists.
+
+The reader covers the ISO-style dialect of the grammars under `examples/`:
+
+    rule        name = expression ;       (`.` also ends a rule, `. ;` too)
+    expression  alternatives separated by `|`; items in a sequence are
+                separated by `,` or just whitespace; `[ ... ]` optional,
+                `{ ... }` repetition, `( ... )` grouping, quoted literals
+                and `? ... ?` special sequences
+    annotations @name("arg", ...) before or after a rule's terminator
+    directives  MODULE "name" { ... } ;   IMPORT "file" ;
+                DEPRECATE Name WITH "message" ;
+                IFDEF "flag" THEN { ... } ENDIF ;
+    comments    `//` to the end of the line; a `? ... ?` special sequence
+                standing alone as a statement is a comment as well
+
+Literals have no escapes: a string runs to the next matching quote, so
+`'\'` is a backslash. A special sequence runs to the next `?` on its line
+that is not inside quotes, which lets the example grammars quote `?`
+characters inside one. Lines of a
+MIME multipart boundary (`--boundary...` plus its header lines), as found in
+concatenated section files, are skipped.
+
+The text is tokenized by one compiled regular expression into a list of
+token strings and parsed by recursive descent over that list, so no Python
+code runs per character.
+`parse_ebnf` returns the statements (Rule, Module, Import, Deprecate and
+Conditional nodes); `rules_of` flattens them to the Rule list the
+transformer and parsers consume. `EBNFStreamParser` (and `iter_ebnf`) read
+the same statements from text arriving in chunks, returning each one as soon
+as it is complete.
+"""
+import re
+from typing import Iterable, Iterator, List, Optional
+
+from ..core.ast import ASTNode
+
+# Whitespace, comments and MIME boundary blocks are folded into the front of
+# each match, so every match is exactly one token and `findall` returns the
+# token strings without building a match object apiece. The final match is
+# the empty string at the end of the text, which the reader uses as EOF.
+_TOKEN = re.compile(r"""
+    (?:\s+|//[^\n]*|^--\S+[^\n]*(?:\n(?:[\w-]+:[^\n]*\n)*|\Z))*
+    (
+        "[^"\n]*" | '[^'\n]*'           # literal
+      | \?(?:"[^"\n]*"|'[^'\n]*'|[^?\n])*\?  # special sequence
+      | \w[\w-]*(?:<[\w,\ ]*>)?         # identifier, e.g. meta-identifier, List<Int>
+      | [=,|;.\[\](){}@]                # punctuation
+      | .                               # anything else is an error
+      | \Z
+    )
+""", re.VERBOSE | re.MULTILINE)
+
+# A MIME boundary line followed only by header lines, up to the end of the
+# text scanned so far: its block may not be over yet.
+_OPEN_BOUNDARY = re.compile(r"^--\S+[^\n]*\n(?:[\w-]+:[^\n]*\n)*\Z", re.MULTILINE)
+
+_PUNCT = frozenset('=,|;.[](){}@')
+_CLOSING = {'[': ']', '{': '}', '(': ')'}
+_OPENING = {v: k for k, v in _CLOSING.items()}
+_BRACKET_NODE = {'[': 'Optional', '{': 'Repetition'}
+_TERMINATORS = frozenset(';.')
+# Tokens that end an expression without belonging to it.
+_EXPRESSION_END = frozenset(';.)]}|@')
+_DIRECTIVES = frozenset(('MODULE', 'IMPORT', 'IFDEF'))
+
+
+class EBNFSyntaxError(ValueError):
+    """Raised for grammar text the reader cannot make sense of."""
+    def __init__(self, message: str, text: str, offset: int, source: Optional[str] = None,
+                 first_line: int = 1):
+        self.line = text.count('\n', 0, offset) + first_line
+        self.column = offset - (text.rfind('\n', 0, offset) + 1) + 1
+        self.source = source
+        super().__init__(f"{source or '<string>'}:{self.line}:{self.column}: {message}")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits grammar text into token strings, dropping whitespace and comments.
+
+    A token's kind follows from its first character: a quote starts a
+    literal, `?` a special sequence, a word character an identifier. The
+    list always ends with an empty-string EOF token.
+    """
+    return _TOKEN.findall(text)
+
+
+def _is_identifier(token: str) -> bool:
+    return token[:1].isalnum() or token[:1] == '_'
+
+
+def _is_string(token: str) -> bool:
+    return token[:1] in ('"', "'")
+
+
+class _Reader:
+    """Recursive-descent parser over the token list of one text."""
+    def __init__(self, text: str, source: Optional[str], first_line: int = 1):
+        self.text = text
+        self.source = source
+        self.first_line = first_line
+        self.tokens = tokenize(text)
+        self.pos = 0
+
+    # --- Token helpers ---
+
+    def error(self, message: str, index: Optional[int] = None) -> EBNFSyntaxError:
+        """Builds an error at a token; offsets are only recovered on this path."""
+        index = self.pos if index is None else index
+        offset = len(self.text)
+        for i, match in enumerate(_TOKEN.finditer(self.text)):
+            if i == index:
+                offset = match.start(1)
+                break
+        token = self.tokens[index]
+        found = repr(token) if token else 'end of input'
+        return EBNFSyntaxError(f"{message}, found {found}", self.text, offset, self.source, self.first_line)
+
+    def expect(self, token: str) -> None:
+        if self.tokens[self.pos] != token:
+            raise self.error(f"Expected {token!r}")
+        self.pos += 1
+
+    def accept(self, token: str) -> bool:
+        if self.tokens[self.pos] == token:
+            self.pos += 1
+            return True
+        return False
+
+    def identifier(self) -> str:
+        token = self.tokens[self.pos]
+        if not _is_identifier(token):
+            raise self.error("Expected an identifier")
+        self.pos += 1
+        return token
+
+    def string(self) -> str:
+        token = self.tokens[self.pos]
+        if not _is_string(token):
+            raise self.error("Expected a quoted string")
+        self.pos += 1
+        return token[1:-1]
+
+    # --- Statements ---
+
+    def statements(self, closing: Optional[str] = None) -> List[ASTNode]:
+        """Parses statements up to `closing` (a `}`) or the end of input."""
+        tokens = self.tokens
+        result: List[ASTNode] = []
+        last_rule: Optional[ASTNode] = None
+        while True:
+            token = tokens[self.pos]
+            if not token:
+                if closing is not None:
+                    raise self.error(f"Expected {closing!r}")
+                return result
+            if token == closing:
+                return result
+            if token in _TERMINATORS:
+                self.pos += 1
+            elif token == '@':
+                # An annotation written after its rule's terminator.
+                if last_rule is None:
+                    raise self.error("Annotation without a preceding rule")
+                last_rule.children.extend(self.annotations())
+            elif token[0] == '?' and len(token) > 1:
+                self.pos += 1
+            elif token in _DIRECTIVES and _is_string(tokens[self.pos + 1]):
+                result.append(self.directive())
+            elif token == 'DEPRECATE' and _is_identifier(tokens[self.pos + 1]):
+                result.append(self.directive())
+            elif _is_identifier(token):
+                hoisted: List[ASTNode] = []
+                last_rule = self.rule(hoisted)
+                result.append(last_rule)
+                result.extend(hoisted)
+            else:
+                raise self.error("Expected a rule or directive")
+
+    def directive(self) -> ASTNode:
+        keyword = self.identifier()
+        if keyword == 'MODULE':
+            name = self.string()
+            self.expect('{')
+            body = self.statements('}')
+            self.expect('}')
+            return ASTNode('Module', value=name, children=body)
+        if keyword == 'IMPORT':
+            node = ASTNode('Import', value=self.string())
+            self.expect(';')
+            return node
+        if keyword == 'DEPRECATE':
+            name = self.identifier()
+            self.expect('WITH')
+            node = ASTNode('Deprecate', value=name, children=[ASTNode('Literal', value=self.string())])
+            self.expect(';')
+            return node
+        # IFDEF "flag" THEN { ... } ENDIF
+        flag = self.string()
+        self.expect('THEN')
+        self.expect('{')
+        body = self.statements('}')
+        self.expect('}')
+        self.expect('ENDIF')
+        return ASTNode('Conditional', value=flag, children=body)
+
+    def annotations(self) -> List[ASTNode]:
+        """Parses `@name("arg", ...)` annotations, one node per annotation."""
+        result: List[ASTNode] = []
+        while self.accept('@'):
+            name = self.identifier()
+            args: List[ASTNode] = []
+            self.expect('(')
+            if not self.accept(')'):
+                args.append(ASTNode('Literal', value=self.string()))
+                while self.accept(','):
+                    args.append(ASTNode('Literal', value=self.string()))
+                self.expect(')')
+            result.append(ASTNode('Annotation', value=name, children=args))
+        return result
+
+    def rule(self, hoisted: List[ASTNode]) -> ASTNode:
+        """
+        Parses `name = expression ;` into Rule(Identifier, Definition, *Annotation).
+
+        Conditional blocks nested inside the expression are appended to
+        `hoisted`; they add rules, not symbols, so the expression skips them.
+        """
+        name = self.identifier()
+        self.expect('=')
+        expression = self.expression(hoisted)
+        annotations = self.annotations()
+        if self.tokens[self.pos] not in _TERMINATORS:
+            raise self.error(f"Expected ';' to end rule {name!r}")
+        self.pos += 1
+        children = [ASTNode('Identifier', value=name), ASTNode('Definition', children=[expression])]
+        children.extend(annotations)
+        return ASTNode('Rule', children=children)
+
+    # --- Expressions ---
+
+    def expression(self, hoisted: List[ASTNode]) -> ASTNode:
+        alternatives = [self.sequence(hoisted)]
+        while self.accept('|'):
+            alternatives.append(self.sequence(hoisted))
+        return alternatives[0] if len(alternatives) == 1 else ASTNode('Choice', children=alternatives)
+
+    def sequence(self, hoisted: List[ASTNode]) -> ASTNode:
+        tokens = self.tokens
+        items: List[ASTNode] = []
+        while True:
+            token = tokens[self.pos]
+            first = token[:1]
+            if first == ',':
+                self.pos += 1
+            elif not token or token in _EXPRESSION_END:
+                break
+            elif first in ('"', "'"):
+                self.pos += 1
+                items.append(ASTNode('Literal', value=token[1:-1]))
+            elif token == 'IFDEF' and _is_string(tokens[self.pos + 1]):
+                hoisted.append(self.directive())
+            else:
+                items.append(self.factor(hoisted))
+        return items[0] if len(items) == 1 else ASTNode('Sequence', children=items)
+
+    def factor(self, hoisted: List[ASTNode]) -> ASTNode:
+        token = self.tokens[self.pos]
+        if _is_identifier(token):
+            self.pos += 1
+            return ASTNode('Identifier', value=token)
+        if token[:1] == '?' and len(token) > 1:
+            self.pos += 1
+            return ASTNode('Special', value=token[1:-1].strip())
+        if token in _CLOSING:
+            self.pos += 1
+            inner = self.expression(hoisted)
+            self.expect(_CLOSING[token])
+            if token == '(':
+                return inner
+            return ASTNode(_BRACKET_NODE[token], children=[inner])
+        raise self.error("Expected a symbol or group")
+
+
+def parse_ebnf(text: str, source: Optional[str] = None, first_line: int = 1) -> List[ASTNode]:
+    """
+    Parses grammar text into its top-level statements.
+
+    Args:
+        text: The grammar source.
+        source: A file name used in error messages.
+        first_line: The line number of the text's first line in `source`,
+                    for text cut out of a larger file.
+
+    Returns:
+        Rule, Module, Import, Deprecate and Conditional nodes in source order.
+
+    Raises:
+        EBNFSyntaxError: If the text is not a grammar in the supported dialect.
+    """
+    return _Reader(text, source, first_line).statements()
+
+
+class EBNFStreamParser:
+    """
+    Push-style reader: feed grammar text in chunks, get statements back as
+    soon as they are complete.
+
+    Only complete lines are tokenized, so no token is ever cut in half. The
+    scanner tracks bracket depth and whether it is inside a rule; a `;`/`.`
+    at depth 0, or the `}` or `ENDIF` closing a top-level MODULE or IFDEF
+    block, ends a statement once the next token shows it is not continued
+    by an `@annotation` or an `ENDIF`. Everything up to the last such boundary
+    is parsed with `parse_ebnf` and dropped from the buffer, so memory stays
+    bounded by the longest top-level statement plus one chunk. The
+    statements returned by `feed()` and `close()`, concatenated, equal what
+    `parse_ebnf` returns for the whole text.
+    """
+    def __init__(self, source: Optional[str] = None):
+        self.source = source
+        self._buffer = ""
+        # Where scanning resumes, and the scanner state at that point.
+        self._pos = 0
+        self._depth = 0
+        self._in_rule = False
+        self._pending: Optional[int] = None
+        # Position of the buffer's first character in the whole text.
+        self._line = 1
+        self._column = 0
+        self._closed = False
+
+    def feed(self, chunk: str) -> List[ASTNode]:
+        """
+        Adds text and returns the statements it completed.
+
+        Raises:
+            EBNFSyntaxError: If a completed statement does not parse.
+            ValueError: If the stream was already closed.
+        """
+        if self._closed:
+            raise ValueError("feed() after close()")
+        self._buffer += chunk
+        buffer = self._buffer
+        limit = buffer.rfind('\n', self._pos) + 1
+        if limit == 0:
+            return []
+        # A MIME boundary block may still be missing header lines.
+        boundary = _OPEN_BOUNDARY.search(buffer, self._pos, limit)
+        if boundary is not None:
+            limit = boundary.start()
+
+        cut = 0
+        depth, in_rule, pending = self._depth, self._in_rule, self._pending
+        for match in _TOKEN.finditer(buffer, self._pos, limit):
+            token = match.group(1)
+            if not token:
+                self._pos = match.start()
+                break
+            if pending is not None:
+                if token != '@' and token != 'ENDIF':
+                    cut = pending
+                pending = None
+            if token in _CLOSING:
+                depth += 1
+            elif token in _OPENING:
+                depth -= 1
+                if token == '}' and depth == 0 and not in_rule:
+                    pending = match.end()
+            elif depth == 0:
+                if token == '=':
+                    in_rule = True
+                elif token in _TERMINATORS:
+                    in_rule = False
+                    pending = match.end()
+                elif token == 'ENDIF' and not in_rule:
+                    pending = match.end()
+        self._depth = depth
+        self._in_rule = in_rule
+        self._pending = pending
+        if not cut:
+            return []
+
+        statements = self._parse(buffer[:cut])
+        newline = buffer.rfind('\n', 0, cut)
+        self._column = cut - newline - 1 if newline >= 0 else self._column + cut
+        self._line += buffer.count('\n', 0, cut)
+        self._buffer = buffer[cut:]
+        self._pos -= cut
+        if self._pending is not None:
+            self._pending -= cut
+        return statements
+
+    def close(self) -> List[ASTNode]:
+        """Parses whatever text is left and returns its statements."""
+        if self._closed:
+            return []
+        self._closed = True
+        statements = self._parse(self._buffer)
+        self._buffer = ""
+        return statements
+
+    def _parse(self, text: str) -> List[ASTNode]:
+        # Padding the first line keeps error columns right for text that
+        # starts mid-line.
+        return parse_ebnf(' ' * self._column + text, self.source, self._line)
+
+
+def iter_ebnf(chunks: Iterable[str], source: Optional[str] = None) -> Iterator[ASTNode]:
+    """Yields the statements of grammar text arriving as `chunks`, as they complete."""
+    stream = EBNFStreamParser(source)
+    for chunk in chunks:
+        yield from stream.feed(chunk)
+    yield from stream.close()
+
+
+def iter_grammar_file(path: str, chunk_size: int = 1 << 16) -> Iterator[ASTNode]:
+    """Streams the statements of a grammar file without reading it whole."""
+    with open(path, encoding='utf-8') as f:
+        yield from iter_ebnf(iter(lambda: f.read(chunk_size), ''), source=path)
+
+
+def rules_of(statements: Iterable[ASTNode], defines: Iterable[str] = ()) -> List[ASTNode]:
+    """
+    Flattens statements into the Rule nodes of an active configuration.
+
+    Module bodies are inlined and IFDEF blocks are kept only when their flag
+    is in `defines`. Import and Deprecate directives are dropped; resolving
+    them is up to the caller.
+    """
+    active = set(defines)
+    rules: List[ASTNode] = []
+    stack = list(reversed(list(statements)))
+    while stack:
+        node = stack.pop()
+        if node.term_type == 'Rule':
+            rules.append(node)
+        elif node.term_type == 'Module' or (node.term_type == 'Conditional' and node.value in active):
+            stack.extend(reversed(node.children))
+    return rules
+
+
+def load_grammar(path: str, defines: Iterable[str] = ()) -> List[ASTNode]:
+    """Reads a grammar file and returns its rules; see `rules_of`."""
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    return rules_of(parse_ebnf(text, source=path), defines)
+
+
+if __name__ == '__main__':
+    print("--- EBNF Reader Demonstration ---")
+    import os
+    import sys
+    import time
+
+    examples = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'examples')
+    paths = sys.argv[1:] or sorted(
+        os.path.join(root, name)
+        for root, _, names in os.walk(examples) for name in names if name.endswith('.ebnf'))
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            text = f.read()
+        started = time.perf_counter()
+        statements = parse_ebnf(text, source=path)
+        elapsed = time.perf_counter() - started
+        rules = rules_of(statements)
+        print(f"{os.path.relpath(path, examples)}: {len(rules)} rules, "
+              f"{len(statements)} statements in {elapsed * 1000:.2f} ms")
+
+    # A parenthesized choice inside a sequence keeps all of its alternatives.
+    from ..parser.earley import EarleyParser
+    grouped = EarleyParser.from_ast(rules_of(parse_ebnf("A = 'x', ('y' | 'z') ;")))
+    assert grouped.recognize("xy") and grouped.recognize("xz") and not grouped.recognize("x")
+    print("Grouped alternatives: 'xy' and 'xz' both accepted.")
+
+    # Each special sequence ends at its own closing '?'.
+    specials = rules_of(parse_ebnf("x = ? a ? | ? b ? ;"))[0].children[1].children[0]
+    assert specials.term_type == 'Choice' and [c.term_type for c in specials.children] == ['Special', 'Special']
+    print(f"Special sequences: {[c.value for c in specials.children]}")
+    print("\n✅ Demonstration complete.")
@@ -0,0 +1,66 @@
+# src/dsl_parser/grammar/symbols.py
+"""
+Interns grammar symbols as dense integer IDs.
+
+The CNF pipeline compares, hashes and deduplicates symbols and productions
+millions of times on the combined Unicode + bootstrap grammar. Working on
+small ints and tuples of ints instead of strings and lists makes those
+operations cheap and lets productions live in sets; names are only looked
+up again when a grammar leaves the pipeline.
+"""
+from typing import Dict, Iterable, List, Tuple
+
+# The named form used at the API boundary: head -> list of symbol lists.
+SimpleGrammar = Dict[str, List[List[str]]]
+# A production is a tuple of symbol IDs; a grammar maps head IDs to them.
+Production = Tuple[int, ...]
+IntGrammar = Dict[int, List[Production]]
+
+
+class SymbolTable:
+    """A bidirectional mapping between symbol names and dense int IDs."""
+    __slots__ = ('_ids', 'names')
+
+    def __init__(self, names: Iterable[str] = ()):
+        self._ids: Dict[str, int] = {}
+        self.names: List[str] = []
+        for name in names:
+            self.intern(name)
+
+    def intern(self, name: str) -> int:
+        """Returns the ID of `name`, assigning the next free one if it is new."""
+        symbol_id = self._ids.get(name)
+        if symbol_id is None:
+            symbol_id = self._ids[name] = len(self.names)
+            self.names.append(name)
+        return symbol_id
+
+    def id(self, name: str) -> int:
+        """
+        Returns the ID of an already interned name.
+
+        Raises:
+            KeyError: If `name` was never interned.
+        """
+        return self._ids[name]
+
+    def name(self, symbol_id: int) -> str:
+        return self.names[symbol_id]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._ids
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def encode_grammar(self, grammar: SimpleGrammar) -> IntGrammar:
+        """Interns every symbol of a named grammar dictionary."""
+        intern = self.intern
+        return {intern(head): [tuple(intern(s) for s in prod) for prod in prods]
+                for head, prods in grammar.items()}
+
+    def decode_grammar(self, grammar: IntGrammar) -> SimpleGrammar:
+        """Turns an ID grammar back into a named grammar dictionary."""
+        names = self.names
+        return {names[head]: [[names[s] for s in prod] for prod in prods]
+                for head, prods in grammar.items()}
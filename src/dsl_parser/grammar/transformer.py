@@ -1,70 +1,250 @@
 # src/dsl_parser/grammar/transformer.py
 """
 Transforms a grammar represented by an AST into Chomsky Normal Form (CNF).
+
+Every pass runs on interned symbol IDs (see `symbols.SymbolTable`), with
+productions stored as tuples of ints; the named `SimpleGrammar` form is only
+produced by the `grammar` property and `transform()`.
 """
+import contextlib
+import hashlib
 import itertools
+import logging
 from collections import defaultdict
-from typing import List, Dict, Set
+from typing import Callable, ContextManager, Dict, Iterable, List, Optional, Set, Tuple
 
 from ..core.ast import ASTNode
+from ..core.charclass import is_class_terminal
+from .analysis import nullable_symbols
+from .metrics import PipelineMetrics
+from .symbols import IntGrammar, Production, SimpleGrammar, SymbolTable
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever a change to the pipeline changes its output for the same
+# input; compiled-grammar caches are keyed on it.
+TRANSFORMER_VERSION = 5
+
+def referenced_symbols(grammar_ast: Iterable[ASTNode]) -> Set[str]:
+    """Returns the names the rules' definitions refer to, defined or not."""
+    return {node.value for rule in grammar_ast if rule.term_type == 'Rule'
+            for node in rule.children[1].walk() if node.term_type == 'Identifier'}
+
+
+def reachable_rules(grammar_ast: List[ASTNode], start_symbol: str) -> List[ASTNode]:
+    """
+    Keeps the Rule nodes reachable from `start_symbol`, in their source order.
+
+    Working on the AST lets whole subgrammars (such as unused Unicode
+    categories) be dropped before any of their symbols are interned.
+    """
+    definitions: Dict[str, List[ASTNode]] = defaultdict(list)
+    for rule in grammar_ast:
+        if rule.term_type == 'Rule':
+            definitions[rule.children[0].value].append(rule)
+    reached: Set[str] = set()
+    stack = [start_symbol]
+    while stack:
+        name = stack.pop()
+        if name in reached or name not in definitions:
+            continue
+        reached.add(name)
+        for rule in definitions[name]:
+            stack.extend(node.value for node in rule.children[1].walk() if node.term_type == 'Identifier')
+    return [rule for rule in grammar_ast if rule.term_type == 'Rule' and rule.children[0].value in reached]
 
-# Type alias for the internal grammar dictionary format
-SimpleGrammar = Dict[str, List[List[str]]]
 
 class CNFTransformer:
     """
     A class to perform EBNF to CNF transformation on a grammar AST.
     """
-    def __init__(self, grammar_ast: List[ASTNode]):
+    def __init__(self, grammar_ast: List[ASTNode], metrics: Optional[PipelineMetrics] = None,
+                 start_symbol: Optional[str] = None, prune: bool = False):
+        """
+        Args:
+            grammar_ast: The Rule nodes of the grammar.
+            metrics: Records timings and grammar sizes for every stage,
+                     including the AST conversion done here.
+            start_symbol: The start symbol; defaults to the first rule's name.
+            prune: Drop the rules the start symbol cannot reach, and the
+                   unproductive nonterminals (with every production that
+                   mentions them), before any other stage runs.
+        """
+        self.metrics = metrics
         self._rule_counter: int = 0
-        self.grammar: SimpleGrammar = self._ast_to_dict(grammar_ast)
-        self.terminals: Set[str] = self._find_terminals()
-        self.start_symbol: str = grammar_ast[0].children[0].value if grammar_ast else ""
+        self.symbols = SymbolTable()
+        # Terminal ID -> the ID of its `TERM_x -> x` wrapper rule.
+        self._wrappers: Dict[int, int] = {}
+        # Hash-consing table for generated helpers: ('Optional' | 'Repetition'
+        # | 'Group', inner productions) or ('BIN', symbol suffix) -> the helper's ID.
+        self._shared: Dict[Tuple, int] = {}
+        self._grammar: IntGrammar = {}
+        # Head -> {production inherited through unit productions: the source
+        # rules it was inlined from, outermost first}; see `unit_chains`.
+        self._unit_chains: Dict[int, Dict[Production, Tuple[int, ...]]] = {}
+        self.start_symbol: str = start_symbol or (grammar_ast[0].children[0].value if grammar_ast else "")
+        if prune:
+            with self._stage('select_rules'):
+                grammar_ast = reachable_rules(grammar_ast, self.start_symbol)
+        # Names of the rules written in the source grammar, as opposed to helpers.
+        self.rule_names: Set[str] = {r.children[0].value for r in grammar_ast if r.term_type == 'Rule'}
+        with self._stage('ast_to_dict'):
+            self._grammar = self._ast_to_dict(grammar_ast)
+        if prune:
+            with self._stage('prune'):
+                self._prune()
+        self._terminals: Set[int] = self._find_terminals()
+
+    @property
+    def grammar(self) -> SimpleGrammar:
+        """The current grammar with symbol names; decoded on every access."""
+        return self.symbols.decode_grammar(self._grammar)
+
+    @property
+    def unit_chains(self) -> Dict[str, Dict[Tuple[str, ...], Tuple[str, ...]]]:
+        """
+        The source rules that unit elimination inlined into each production.
+
+        `A = B ; B = x, y ;` leaves `A -> x y`; its chain `('B',)` lets a
+        parser put the `B` node back between `A` and the children. Only
+        rules named in the source appear in chains, outermost first.
+        """
+        names = self.symbols.names
+        return {names[head]: {tuple(names[s] for s in prod): tuple(names[s] for s in chain)
+                              for prod, chain in chains.items()}
+                for head, chains in self._unit_chains.items() if chains}
+
+    @property
+    def terminals(self) -> Set[str]:
+        names = self.symbols.names
+        return {names[t] for t in self._terminals}
 
     def transform(self) -> SimpleGrammar:
         """Executes the full CNF transformation pipeline."""
-        print("Starting CNF transformation pipeline...")
-        self._eliminate_epsilon()
-        self._eliminate_units()
-        self._isolate_terminals()
-        self._binarize()
-        print("✅ CNF transformation complete.")
+        logger.info("Starting CNF transformation pipeline...")
+        # Binarizing first bounds every production at two symbols, so epsilon
+        # elimination adds at most three variants per production instead of
+        # one per subset of nullable positions.
+        with self._stage('binarize'):
+            self._binarize()
+        with self._stage('eliminate_epsilon'):
+            self._eliminate_epsilon()
+        with self._stage('eliminate_units'):
+            self._eliminate_units()
+        with self._stage('isolate_terminals'):
+            self._isolate_terminals()
+        with self._stage('minimize'):
+            self._minimize()
+        logger.info("CNF transformation complete.")
         return self.grammar
 
+    def _stage(self, name: str) -> ContextManager[object]:
+        """Measures a stage when metrics are enabled; a no-op otherwise."""
+        if self.metrics is None:
+            return contextlib.nullcontext()
+        return self.metrics.stage(name, lambda: self._grammar, lambda: self._rule_counter)
+
+    def _count(self, counter: str, value: int) -> None:
+        if self.metrics is not None:
+            self.metrics.count(counter, value)
+
+    def _prune(self) -> None:
+        """
+        Drops unproductive nonterminals, then those unreachable from the start.
+
+        A nonterminal is productive once one of its productions has only
+        terminals and productive nonterminals, found with the same counting
+        worklist as `_find_nullable`. Productions mentioning an unproductive
+        nonterminal can never complete a parse, so they go too; reachability
+        is computed afterwards because removing them can orphan rules.
+        """
+        logger.info("Step 1: Pruning unproductive and unreachable rules...")
+        grammar = self._grammar
+        remaining: Dict[Tuple[int, int], int] = {}
+        occurrences: Dict[int, List[Tuple[int, int]]] = defaultdict(list)
+        worklist: List[int] = []
+        for head, productions in grammar.items():
+            for i, prod in enumerate(productions):
+                pending = [s for s in prod if s in grammar]
+                remaining[(head, i)] = len(pending)
+                if not pending:
+                    worklist.append(head)
+                for symbol in pending:
+                    occurrences[symbol].append((head, i))
+        productive: Set[int] = set()
+        while worklist:
+            symbol = worklist.pop()
+            if symbol in productive:
+                continue
+            productive.add(symbol)
+            for key in occurrences[symbol]:
+                remaining[key] -= 1
+                if remaining[key] == 0 and key[0] not in productive:
+                    worklist.append(key[0])
+
+        unproductive = [h for h in grammar if h not in productive]
+        dropped_productions = 0
+        if unproductive:
+            dead = set(unproductive)
+            for head in unproductive:
+                dropped_productions += len(grammar.pop(head))
+            for head, productions in grammar.items():
+                kept = [p for p in productions if dead.isdisjoint(p)]
+                dropped_productions += len(productions) - len(kept)
+                grammar[head] = kept
+        self._count('unproductive', len(unproductive))
+
+        reached: Set[int] = set()
+        stack = [self.symbols.id(self.start_symbol)] if self.start_symbol in self.symbols else []
+        while stack:
+            head = stack.pop()
+            if head in reached or head not in grammar:
+                continue
+            reached.add(head)
+            stack.extend(s for prod in grammar[head] for s in prod)
+        unreachable = [h for h in grammar if h not in reached]
+        for head in unreachable:
+            dropped_productions += len(grammar.pop(head))
+        self._count('unreachable', len(unreachable))
+        self._count('dropped_productions', dropped_productions)
+
+    def _find_nullable(self) -> Set[int]:
+        """Computes the nullable nonterminals (see `analysis.nullable_symbols`)."""
+        return nullable_symbols(self._grammar)
+
     def _eliminate_epsilon(self):
         """Finds all nullable rules and eliminates them."""
-        print("Step 2: Eliminating epsilon productions...")
-        nullable: Set[str] = set()
-        while True:
-            newly_added = False
-            for head, productions in self.grammar.items():
-                if head in nullable: continue
-                for prod in productions:
-                    if not prod:
-                        nullable.add(head)
-                        newly_added = True
-                        break
-                    if all(s in nullable for s in prod):
-                        nullable.add(head)
-                        newly_added = True
-                        break
-            if not newly_added: break
-        
-        new_productions: SimpleGrammar = defaultdict(list)
-        for head, productions in self.grammar.items():
-            for prod in productions:
-                nullable_indices = [i for i, s in enumerate(prod) if s in nullable]
-                for i in range(1, len(nullable_indices) + 1):
-                    for combo in itertools.combinations(nullable_indices, i):
-                        new_prod = [s for j, s in enumerate(prod) if j not in combo]
-                        if new_prod and new_prod not in new_productions[head]:
-                             new_productions[head].append(new_prod)
-        
-        for head, prods in new_productions.items():
-            self.grammar[head].extend(prods)
+        logger.info("Step 3: Eliminating epsilon productions...")
+        nullable = self._find_nullable()
+        if self.metrics is not None:
+            self._count('nullable', len(nullable))
+            self._count('combinations', sum(1 << sum(s in nullable for s in prod)
+                                            for prods in self._grammar.values() for prod in prods))
+        for head, productions in self._grammar.items():
+            self._grammar[head] = self._drop_nullable(productions, nullable)
 
-        for head in list(self.grammar.keys()):
-            self.grammar[head] = [p for p in self.grammar[head] if p]
+    @staticmethod
+    def _drop_nullable(productions: List[Production], nullable: Set[int]) -> List[Production]:
+        """Returns one head's productions without epsilons, given the nullable set."""
+        seen: Set[Production] = set()
+        result: List[Production] = []
+        # Original productions keep their order; the variants with
+        # nullable symbols dropped follow, deduplicated by tuple.
+        for prod in productions:
+            if prod and prod not in seen:
+                seen.add(prod)
+                result.append(prod)
+        for prod in productions:
+            nullable_indices = [i for i, s in enumerate(prod) if s in nullable]
+            if not nullable_indices:
+                continue
+            for keep in itertools.product((True, False), repeat=len(nullable_indices)):
+                dropped = {i for i, k in zip(nullable_indices, keep) if not k}
+                key = tuple(s for j, s in enumerate(prod) if j not in dropped)
+                if key and key not in seen:
+                    seen.add(key)
+                    result.append(key)
+        return result
 
     # In class CNFTransformer:
     def _generate_new_non_terminal(self, base_name: str | None = "NT") -> str:
@@ -77,131 +257,464 @@ class CNFTransformer:
         safe_prefix = prefix.replace('?', '_opt').replace('*', '_rep').replace('+', '_plus')
         return f"{safe_prefix}_{self._rule_counter}"
 
-    def _eliminate_units(self):
-        """Removes all unit productions of the form A -> B."""
-        print("Step 3: Eliminating unit productions...")
-        while True:
-            unit_rules = [(h, p[0]) for h, prods in self.grammar.items() for p in prods if len(p) == 1 and p[0] not in self.terminals]
-            if not unit_rules:
-                break
-            
-            for head, body in unit_rules:
-                # Remove the unit production A -> B
-                self.grammar[head].remove([body])
-                # Add all productions of B to A
-                if body in self.grammar:
-                    for prod in self.grammar[body]:
-                        if prod not in self.grammar[head]:
-                            self.grammar[head].append(prod)
+    def _new_non_terminal(self, base_name: str | None = "NT") -> int:
+        """Generates and interns a new non-terminal, returning its ID."""
+        return self.symbols.intern(self._generate_new_non_terminal(base_name))
+
+    def _eliminate_units(self) -> int:
+        """
+        Removes all unit productions of the form A -> B.
+
+        The unit productions form a graph; its strongly connected components
+        (found once, with Tarjan's algorithm) are visited in reverse
+        topological order, so each component's closure of non-unit
+        productions is built from its own members plus the already finished
+        closures of the components it reaches. Unit cycles such as A -> B,
+        B -> A simply collapse into one component.
+
+        Returns:
+            The number of productions added to the grammar.
+        """
+        logger.info("Step 4: Eliminating unit productions...")
+        new_productions, chains, added = self._unit_closures(self._grammar)
+        self._grammar.update(new_productions)
+        self._unit_chains.update(chains)
+        self._count('unit_heads', len(new_productions))
+        self._count('added_productions', added)
+        logger.info("  Added %d productions while removing unit rules.", added)
+        return added
+
+    def _unit_closures(self, grammar: IntGrammar, roots: Optional[Iterable[int]] = None
+                       ) -> Tuple[IntGrammar, Dict[int, Dict[Production, Tuple[int, ...]]], int]:
+        """
+        Computes unit-free productions for the heads of the unit graph.
+
+        Args:
+            grammar: The epsilon-free grammar.
+            roots: Limit the work to the heads reachable from these through
+                   unit productions; all heads by default.
+
+        Returns:
+            The new productions of every head in the (reachable) unit graph,
+            the unit chain of each inherited production (see `unit_chains`),
+            and how many productions they gained.
+        """
+        def unit_targets(head: int) -> List[int]:
+            return [p[0] for p in grammar[head] if len(p) == 1 and p[0] in grammar]
+
+        unit_graph: Dict[int, List[int]] = {}
+        if roots is None:
+            for head in grammar:
+                targets = unit_targets(head)
+                if targets:
+                    unit_graph[head] = targets
+        else:
+            visited: Set[int] = set()
+            stack = list(roots)
+            while stack:
+                head = stack.pop()
+                if head in visited or head not in grammar:
+                    continue
+                visited.add(head)
+                targets = unit_targets(head)
+                if targets:
+                    unit_graph[head] = targets
+                    stack.extend(targets)
+        if not unit_graph:
+            return {}, {}, 0
+
+        components = self._strongly_connected_components(unit_graph)
+        component_of: Dict[int, int] = {}
+        for i, members in enumerate(components):
+            for member in members:
+                component_of[member] = i
+
+        def non_unit(head: int) -> List[Production]:
+            return [p for p in grammar[head] if not (len(p) == 1 and p[0] in grammar)]
+
+        symbols = self.symbols
+        source = {symbols.id(name) for name in self.rule_names if name in symbols}
+        added = 0
+        closures: List[List[Production]] = []
+        new_productions: IntGrammar = {}
+        chains: Dict[int, Dict[Production, Tuple[int, ...]]] = {}
+        for i, members in enumerate(components):
+            seen: Set[Production] = set()
+            closure: List[Production] = []
+            for member in members:
+                for prod in non_unit(member):
+                    if prod not in seen:
+                        seen.add(prod)
+                        closure.append(prod)
+            for member in members:
+                for target in unit_graph.get(member, ()):
+                    successor = component_of[target]
+                    if successor == i:
+                        continue
+                    for prod in closures[successor]:
+                        if prod not in seen:
+                            seen.add(prod)
+                            closure.append(prod)
+            closures.append(closure)
+
+            for member in members:
+                own = non_unit(member)
+                own_set = set(own)
+                inherited = [p for p in closure if p not in own_set]
+                added += len(inherited)
+                new_productions[member] = own + inherited
+                if inherited:
+                    chains[member] = self._member_chains(member, own_set, component_of, unit_graph,
+                                                         non_unit, closures, chains, source)
+        return new_productions, chains, added
+
+    @staticmethod
+    def _member_chains(member: int, own: Set[Production], component_of: Dict[int, int],
+                       unit_graph: Dict[int, List[int]], non_unit: Callable[[int], List[Production]],
+                       closures: List[List[Production]], chains: Dict[int, Dict[Production, Tuple[int, ...]]],
+                       source: Set[int]) -> Dict[Production, Tuple[int, ...]]:
+        """
+        Finds the unit path behind each production `member` inherits.
+
+        The members of its own component are searched breadth first, so each
+        production is credited to the nearest head that owns it; productions
+        from other components extend the chains already found for those.
+        Helpers are left out of the paths, and empty chains are dropped.
+        """
+        component = component_of[member]
+        paths: Dict[int, Tuple[int, ...]] = {member: ()}
+        order = [member]
+        for head in order:
+            for target in unit_graph.get(head, ()):
+                if component_of[target] == component and target not in paths:
+                    paths[target] = paths[head] + ((target,) if target in source else ())
+                    order.append(target)
+        result: Dict[Production, Tuple[int, ...]] = {}
+        for head in order[1:]:
+            for prod in non_unit(head):
+                if prod not in own and prod not in result:
+                    result[prod] = paths[head]
+        for head in order:
+            for target in unit_graph.get(head, ()):
+                if component_of[target] == component:
+                    continue
+                via = paths[head] + ((target,) if target in source else ())
+                below = chains.get(target, {})
+                for prod in closures[component_of[target]]:
+                    if prod not in own and prod not in result:
+                        result[prod] = via + below.get(prod, ())
+        return {prod: chain for prod, chain in result.items() if chain}
+
+    @staticmethod
+    def _strongly_connected_components(graph: Dict[int, List[int]]) -> List[List[int]]:
+        """
+        Returns the SCCs of `graph` in reverse topological order (Tarjan).
+
+        Implemented with an explicit stack so long unit chains cannot hit the
+        recursion limit. Nodes that only appear as edge targets are included.
+        """
+        index: Dict[int, int] = {}
+        low: Dict[int, int] = {}
+        on_stack: Set[int] = set()
+        stack: List[int] = []
+        components: List[List[int]] = []
+
+        for root in graph:
+            if root in index:
+                continue
+            index[root] = low[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(graph.get(root, ())))]
+            while work:
+                node, successors = work[-1]
+                for succ in successors:
+                    if succ not in index:
+                        index[succ] = low[succ] = len(index)
+                        stack.append(succ)
+                        on_stack.add(succ)
+                        work.append((succ, iter(graph.get(succ, ()))))
+                        break
+                    if succ in on_stack:
+                        low[node] = min(low[node], index[succ])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[node])
+                    if low[node] == index[node]:
+                        component: List[int] = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == node:
+                                break
+                        components.append(component)
+        return components
 
     def _isolate_terminals(self):
         """Ensures terminals appear only in rules of the form A -> 'a'."""
-        print("Step 4: Isolating terminals...")
-        new_rules: SimpleGrammar = {}
-        for head, productions in self.grammar.items():
-            for i, prod in enumerate(productions):
-                if len(prod) > 1:
-                    for j, symbol in enumerate(prod):
-                        if symbol in self.terminals:
-                            new_nt_name = f"TERM_{symbol.replace('\'', '')}"
-                            if new_nt_name not in new_rules:
-                                new_rules[new_nt_name] = [[symbol]]
-                            self.grammar[head][i][j] = new_nt_name
-        self.grammar.update(new_rules)
-
-    def _ast_to_dict(self, grammar_ast: List[ASTNode]) -> Dict[str, List[List[str]]]:
-        print("INFO: Converting grammar AST to internal dictionary representation...")
-        grammar_dict: Dict[str, List[List[str]]] = {} # Explicitly type the local variable
+        logger.info("Step 5: Isolating terminals...")
+        new_rules: IntGrammar = {}
+        for head, productions in self._grammar.items():
+            self._wrap_terminals(productions, new_rules, self._unit_chains.get(head))
+        self._grammar.update(new_rules)
+        self._count('terminal_rules', len(new_rules))
+
+    def _wrap_terminals(self, productions: List[Production], new_rules: IntGrammar,
+                        chains: Optional[Dict[Production, Tuple[int, ...]]] = None) -> None:
+        """
+        Replaces, in place, the terminals of productions longer than one symbol
+        by their wrapper rules; wrappers not seen before go into `new_rules`.
+        Unit chains in `chains` follow their productions.
+        """
+        terminals = self._terminals
+        for i, prod in enumerate(productions):
+            if len(prod) > 1 and any(s in terminals for s in prod):
+                productions[i] = tuple(self._wrapper(s, new_rules) if s in terminals else s for s in prod)
+                if chains and prod in chains:
+                    chains[productions[i]] = chains.pop(prod)
+
+    def _wrapper(self, symbol: int, new_rules: IntGrammar) -> int:
+        wrapper = self._wrappers.get(symbol)
+        if wrapper is None:
+            wrapper = self.symbols.intern(self._terminal_rule_name(self.symbols.name(symbol)))
+            self._wrappers[symbol] = wrapper
+            if wrapper not in new_rules:
+                new_rules[wrapper] = [(symbol,)]
+        return wrapper
+
+    @staticmethod
+    def _terminal_rule_name(symbol: str) -> str:
+        """Names the wrapper rule `TERM_x -> x` for a terminal symbol."""
+        if len(symbol) > 32 and is_class_terminal(symbol):
+            # Multi-interval classes can run to kilobytes of text; name them by digest.
+            return f"TERM_CLASS_{hashlib.sha1(symbol.encode()).hexdigest()[:12]}"
+        return f"TERM_{symbol.replace('\'', '')}"
+
+    def _minimize(self) -> int:
+        """
+        Merges helper nonterminals that derive the same language by construction.
+
+        Partition refinement, as in Moore's DFA minimization: all helpers
+        start in one block, while every source rule (and the start symbol)
+        has a block of its own so its name survives for parse trees. Each
+        round splits blocks by each head's set of productions with symbols
+        replaced by their blocks (paired with their unit chains, which name
+        source rules only), until no block splits. Heads left in one block
+        have identical productions up to the partition, so every helper is
+        replaced by its block's first head.
+
+        Returns:
+            The number of nonterminals merged away.
+        """
+        logger.info("Step 6: Merging equivalent nonterminals...")
+        grammar = self._grammar
+        symbols = self.symbols
+        keep = {symbols.id(name) for name in self.rule_names | {self.start_symbol} if name in symbols}
+        # Block IDs are head IDs; terminals are encoded as ~ID, and the
+        # initial block of all helpers gets an ID no symbol has.
+        helpers_block = len(symbols)
+        block: Dict[int, int] = {head: head if head in keep else helpers_block for head in grammar}
+        keep &= grammar.keys()
+        count = len(set(block.values()))
+        while True:
+            firsts: Dict[Tuple, int] = {}
+            refined: Dict[int, int] = {}
+            for head, productions in grammar.items():
+                if head in keep:
+                    refined[head] = head
+                    continue
+                chains = self._unit_chains.get(head, {})
+                signature = (block[head], frozenset((tuple(block.get(s, ~s) for s in prod), chains.get(prod, ()))
+                                                    for prod in productions))
+                refined[head] = firsts.setdefault(signature, head)
+            block = refined
+            if len(firsts) + len(keep) == count:
+                break
+            count = len(firsts) + len(keep)
+
+        rename = {head: rep for head, rep in block.items() if rep != head}
+        if not rename:
+            return 0
+        for head in rename:
+            del grammar[head]
+            self._unit_chains.pop(head, None)
+        for head, productions in grammar.items():
+            chains = self._unit_chains.get(head, {})
+            renamed_chains: Dict[Production, Tuple[int, ...]] = {}
+            seen: Set[Production] = set()
+            result: List[Production] = []
+            for prod in productions:
+                renamed = tuple(rename.get(s, s) for s in prod)
+                if renamed not in seen:
+                    seen.add(renamed)
+                    result.append(renamed)
+                    if prod in chains:
+                        renamed_chains[renamed] = chains[prod]
+            grammar[head] = result
+            if chains:
+                self._unit_chains[head] = renamed_chains
+        self._wrappers = {t: rename.get(w, w) for t, w in self._wrappers.items()}
+        self._count('merged', len(rename))
+        logger.info("  Merged %d nonterminals.", len(rename))
+        return len(rename)
+
+    def _ast_to_dict(self, grammar_ast: List[ASTNode]) -> IntGrammar:
+        logger.info("Converting grammar AST to internal dictionary representation...")
+        grammar_dict: IntGrammar = {}
         for rule_node in grammar_ast:
             if rule_node.term_type != 'Rule': continue
-            
-            lhs_node = rule_node.children[0]
-            rule_name = lhs_node.value
-            
-            # We pass the specifically-typed grammar_dict to the helper
-            grammar_dict[rule_name] = self._parse_rhs_node(rule_node.children[1].children[0], grammar_dict)
-            
+            self._add_rule(rule_node, grammar_dict)
         return grammar_dict
 
-    def _parse_rhs_node(self, node: ASTNode, grammar: Dict[str, List[List[str]]]) -> List[List[str]]:
+    def _add_rule(self, rule_node: ASTNode, grammar: IntGrammar) -> int:
+        """Expands one Rule node into `grammar` and returns its head's ID."""
+        rule_name = rule_node.children[0].value
+        # The RHS goes first so helper rules precede the rule that uses them.
+        productions = self._parse_rhs_node(rule_node.children[1].children[0], grammar)
+        head = self.symbols.intern(rule_name)
+        grammar[head] = productions
+        return head
+
+    def _parse_rhs_node(self, node: ASTNode, grammar: IntGrammar) -> List[Production]:
         """
         Recursively parses the RHS of a rule, expanding EBNF operators
         and creating new rules as needed.
         """
+        intern = self.symbols.intern
         # Base cases: these nodes represent single symbols
         if node.term_type in ('Identifier', 'Literal'):
-            return [[node.value]]
+            return [(intern(node.value),)]
         if node.term_type == 'HexLiteral':
-            return [[f"#x{node.value}"]]
+            return [(intern(f"#x{node.value}"),)]
         if node.term_type == 'CharRange':
             start, end = node.children[0].value, node.children[1].value
-            return [[f"[#x{start}-#x{end}]"]]
+            return [(intern(f"[#x{start}-#x{end}]"),)]
+        if node.term_type == 'CharClass':
+            # A whole interval set is one terminal symbol.
+            return [(intern(node.value.to_terminal()),)]
+        if node.term_type == 'Special':
+            # `? text ?` is prose, not a pattern; keep it as an opaque terminal.
+            return [(intern(f"?{node.value}?"),)]
 
         # Recursive cases: these nodes define structure
         if node.term_type == 'Choice':
-            productions: List[List[str]] = []
+            productions: List[Production] = []
             for child in node.children:
                 productions.extend(self._parse_rhs_node(child, grammar))
             return productions
         
         if node.term_type == 'Sequence':
-            return [ [item for sublist in [self._parse_rhs_node(child, grammar)[0] for child in node.children] for item in sublist] ]
+            sequence: List[int] = []
+            for child in node.children:
+                child_productions = self._parse_rhs_node(child, grammar)
+                if len(child_productions) == 1:
+                    sequence.extend(child_productions[0])
+                else:
+                    # A grouped choice, e.g. `'x', ('y' | 'z')`: its
+                    # alternatives go into a helper so none of them is lost.
+                    sequence.append(self._group(child, child_productions, grammar))
+            return [tuple(sequence)]
 
         # EBNF Operator Cases: These create new rules
         if node.term_type in ('Optional', 'Repetition', 'RepetitionPlus'): # Handles ?, *, +
-            base_name = node.children[0].flatten()
-            new_nt_name = self._generate_new_non_terminal(base_name)
-            
             # Get the inner expression (e.g., the 'A' in 'A?')
             inner_production = self._parse_rhs_node(node.children[0], grammar)
-            
-            if node.term_type == 'Optional': # For '?'
-                grammar[new_nt_name] = inner_production + [[]] 
-            else: # For '*' and '+'
-                grammar[new_nt_name] = [prod + [new_nt_name] for prod in inner_production] + [[]]
+
+            # Structurally equal operands expand to equal productions, so one
+            # helper serves every occurrence; '*' and '+' share the same one.
+            kind = 'Optional' if node.term_type == 'Optional' else 'Repetition'
+            key = self._share_key((kind, tuple(inner_production)))
+            new_nt = self._shared.get(key)
+            if new_nt is None:
+                new_nt = self._new_non_terminal(node.children[0].flatten())
+                self._shared[key] = new_nt
+                if kind == 'Optional': # For '?'
+                    grammar[new_nt] = inner_production + [()]
+                else: # For '*' and '+'
+                    grammar[new_nt] = [prod + (new_nt,) for prod in inner_production] + [()]
             
             if node.term_type == 'RepetitionPlus': # For '+'
                 # A+ is equivalent to A A*, so we return the inner expression
                 # followed by the new repetition rule.
-                return [[p[0], new_nt_name] for p in inner_production]
+                return [prod + (new_nt,) for prod in inner_production]
 
-            return [[new_nt_name]]
+            return [(new_nt,)]
 
         raise TypeError(f"Unknown AST node type in RHS: {node.term_type}")
 
-    def _find_terminals(self) -> Set[str]:
+    def _group(self, node: ASTNode, productions: List[Production], grammar: IntGrammar) -> int:
+        """Returns the helper deriving exactly `productions`, shared like the operator helpers."""
+        key = self._share_key(('Group', tuple(productions)))
+        new_nt = self._shared.get(key)
+        if new_nt is None:
+            new_nt = self._new_non_terminal(node.flatten())
+            self._shared[key] = new_nt
+            grammar[new_nt] = list(productions)
+        return new_nt
+
+    def _share_key(self, key: Tuple) -> Tuple:
+        """Returns the hash-consing key for a helper; subclasses may scope it."""
+        return key
+
+    def _find_terminals(self) -> Set[int]:
         """Scans the grammar to find all terminal symbols."""
-        # By adding the type annotation here, Pylance knows this is a set of strings
-        terminals: Set[str] = set()
+        grammar = self._grammar
+        terminals: Set[int] = set()
         
-        for productions in self.grammar.values():
+        for productions in grammar.values():
             for prod in productions:
                 for symbol in prod:
-                    terminals.add(symbol)
+                    # Any symbol without a rule of its own is a terminal.
+                    if symbol not in grammar:
+                        terminals.add(symbol)
         return terminals
 
     def _binarize(self):
         """Converts rules with more than 2 symbols into a chain of binary rules."""
-        print("Step 5: Binarizing long rules...")
-        for head in list(self.grammar.keys()):
-            # Using a while loop is safe for in-place modification
-            i = 0
-            while i < len(self.grammar[head]):
-                prod = self.grammar[head][i]
-                if len(prod) > 2:
-                    # Remove the original long production before adding the new chain
-                    self.grammar[head].pop(i)
-                    current_head = head
-                    # Create the chain of intermediate rules
-                    for j in range(len(prod) - 2):
-                        new_nt = self._generate_new_non_terminal(base_name=f"{head}_BIN")
-                        self.grammar.setdefault(current_head, []).append([prod[j], new_nt])
-                        current_head = new_nt
-                    # Terminate the chain with the final two symbols
-                    self.grammar.setdefault(current_head, []).append(prod[-2:])
-                else:
-                    # Only advance if we didn't pop the current item
-                    i += 1
+        logger.info("Step 2: Binarizing long rules...")
+        grammar = self._grammar
+        for head in list(grammar.keys()):
+            self._binarize_head(grammar, head)
+
+    def _binarize_head(self, grammar: IntGrammar, head: int) -> None:
+        """Binarizes one head's productions, adding its chain rules to `grammar`."""
+        productions = grammar[head]
+        if all(len(prod) <= 2 for prod in productions):
+            return
+        base_name = f"{self.symbols.name(head)}_BIN"
+        result: List[Production] = []
+        for prod in productions:
+            if len(prod) <= 2:
+                result.append(prod)
+                continue
+            # A -> x1 x2 ... xn becomes A -> x1 B1, B1 -> x2 B2, ..., Bk -> xn-1 xn.
+            # Each Bj derives exactly the suffix x(j+1) ... xn, so chains are
+            # shared by suffix: the walk stops at the first suffix that
+            # already has a nonterminal, from this rule or any other.
+            new_nt, fresh = self._suffix_non_terminal(prod[1:], base_name)
+            result.append((prod[0], new_nt))
+            j = 1
+            while fresh and j < len(prod) - 2:
+                next_nt, fresh = self._suffix_non_terminal(prod[j + 1:], base_name)
+                grammar[new_nt] = [(prod[j], next_nt)]
+                new_nt = next_nt
+                j += 1
+            if fresh:
+                # Terminate the chain with the final two symbols
+                grammar[new_nt] = [prod[-2:]]
+        grammar[head] = result
+
+    def _suffix_non_terminal(self, suffix: Production, base_name: str) -> Tuple[int, bool]:
+        """Returns the chain nonterminal deriving `suffix`, and whether it is new."""
+        key = self._share_key(('BIN', suffix))
+        nt = self._shared.get(key)
+        if nt is not None:
+            return nt, False
+        nt = self._shared[key] = self._new_non_terminal(base_name)
+        return nt, True
 
 if __name__ == '__main__':
     # This block demonstrates how the transformer would be used.
@@ -2,22 +2,32 @@
 """
 The main entry point for demonstrating and running the DSL parser pipeline.
 """
+import logging
+import os
 import pprint
 from typing import List
 
 from .core.ast import ASTNode
 from .utils.unicode_rules import generate_unicode_ruleset
 from .grammar.bootstrap import get_bootstrap_grammar
-from .grammar.transformer import CNFTransformer, SimpleGrammar
+from .grammar.cache import GrammarCache, compile_grammar, grammar_fingerprint
+from .grammar.transformer import SimpleGrammar, referenced_symbols
 
 def main():
     """Drives the grammar loading and transformation process."""
+    # Show the transformer's stage-by-stage progress messages.
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     print("--- Running Grammar Pipeline Demonstration ---")
 
     # --- Step 1: Load all grammar definitions as ASTs ---
-    print("\n[1/4] Loading foundational Unicode rules...")
-    # Generate the rules
-    unicode_rules_result = generate_unicode_ruleset(output_format='ast')
+    print("\n[1/4] Loading bootstrap grammar for EBNF...")
+    bootstrap_ast: List[ASTNode] = get_bootstrap_grammar()
+    print(f"✅ Loaded {len(bootstrap_ast)} bootstrap rules.")
+
+    print("\n[2/4] Loading the Unicode rules the bootstrap grammar references...")
+    # Only the referenced composite and category rules are generated.
+    unicode_rules_result = generate_unicode_ruleset(output_format='ast',
+                                                    symbols=referenced_symbols(bootstrap_ast))
     
     if not isinstance(unicode_rules_result, list):
         raise TypeError(f"Expected a list of ASTNodes, but got {type(unicode_rules_result)}")
@@ -25,19 +35,22 @@ def main():
     unicode_ast: List[ASTNode] = unicode_rules_result
     print(f"✅ Loaded {len(unicode_ast)} Unicode rules.")
 
-    print("\n[2/4] Loading bootstrap grammar for EBNF...")
-    bootstrap_ast: List[ASTNode] = get_bootstrap_grammar()
-    print(f"✅ Loaded {len(bootstrap_ast)} bootstrap rules.")
-
     # --- Step 2: Combine grammars ---
-    full_grammar_ast: List[ASTNode] = unicode_ast + bootstrap_ast
+    # The bootstrap grammar goes first: its first rule is the start symbol.
+    full_grammar_ast: List[ASTNode] = bootstrap_ast + unicode_ast
     print(f"\n[3/4] Combined grammars. Total rules: {len(full_grammar_ast)}.")
 
     # --- Step 3: Transform grammar to CNF ---
-    print("\n[4/4] Initializing and running the CNF Transformer...")
-    transformer = CNFTransformer(full_grammar_ast)
-    
-    cnf_grammar: SimpleGrammar = transformer.transform()
+    print("\n[4/4] Compiling the grammar to CNF (cached by content hash)...")
+    cache = GrammarCache()
+    was_cached = os.path.exists(cache.path_for(grammar_fingerprint(full_grammar_ast, prune=True)))
+    compiled = compile_grammar(full_grammar_ast, cache, prune=True)
+    if compiled.path is None:
+        print("✅ Compiled grammar (kept in memory; the cache is not writable).")
+    else:
+        print(f"✅ {'Loaded cached' if was_cached else 'Compiled and cached'} grammar: {compiled.path}")
+
+    cnf_grammar: SimpleGrammar = compiled.to_dict()
 
     # --- Step 4: Display the result ---
     print("\n--- Transformation Output ---")
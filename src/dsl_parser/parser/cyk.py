@@ -0,0 +1,343 @@
+# src/dsl_parser/parser/cyk.py
+"""
+A CYK recognizer and parser over the CNF grammars produced by CNFTransformer.
+
+The grammar dictionary is compiled once into integer tables: every
+nonterminal gets a bit position, terminal rules map a terminal to the bitset
+of heads that derive it, and binary rules `A -> B C` are grouped by `B` so a
+pair of chart cells is combined with a handful of mask operations. Each chart
+cell holds the bitset (a Python int) of nonterminals deriving its span.
+
+Terminals may match more than one character (literal strings), so chart
+spans are measured in characters and a terminal seeds the cell for exactly
+the span it matched.
+
+`parse_forest` recovers every derivation at once as a shared packed parse
+forest (see `forest.py`), again straight from the filled bitsets.
+
+Unit elimination copies a rule's productions into the rules that referred
+to it alone (`A = B ;`), so CNF has no production that derives `B` under
+`A`. The transformer's `unit_chains` record where each copy came from, and
+both kinds of tree put the missing nodes back from them.
+"""
+from collections import defaultdict
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from ..core.ast import ASTNode
+from ..grammar.transformer import SimpleGrammar
+from .forest import SYMBOL, TERMINAL, Forest, ForestNode
+from .terminals import TerminalSet
+
+# chart[i][j] is the nonterminal bitset for text[i:j]; only non-empty cells are stored.
+Chart = List[Dict[int, int]]
+
+
+def _bits(mask: int) -> Iterator[int]:
+    """Yields the indices of the set bits of `mask`, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class CYKParser:
+    """Parses text against a grammar in Chomsky Normal Form."""
+    def __init__(self, grammar: SimpleGrammar, start_symbol: str, rule_names: Optional[Set[str]] = None,
+                 unit_chains: Optional[Dict[str, Dict[Tuple[str, ...], Tuple[str, ...]]]] = None):
+        """
+        Compiles a CNF grammar into CYK tables.
+
+        Args:
+            grammar: A CNF grammar, as returned by `CNFTransformer.transform()`.
+            start_symbol: The nonterminal a complete parse must derive.
+            rule_names: The nonterminals to keep as nodes in parse trees.
+                        Helpers introduced by the transformation (`TERM_*`,
+                        `*_BIN_*`, ...) that are not listed are spliced into
+                        their parent. Defaults to keeping every nonterminal.
+            unit_chains: The source rules each production was inlined from,
+                         as `CNFTransformer.unit_chains` returns them.
+
+        Raises:
+            ValueError: If a production is not of the form `A -> a` or `A -> B C`.
+        """
+        self.nonterminals: List[str] = list(grammar)
+        self.index: Dict[str, int] = {nt: i for i, nt in enumerate(self.nonterminals)}
+        self.start_symbol = start_symbol
+        self.rule_names = rule_names
+
+        # terminal -> bitset of heads with a rule `head -> terminal`
+        self.terminal_heads: Dict[str, int] = defaultdict(int)
+        # B -> {C: bitset of heads A with a rule `A -> B C`}
+        self.binary: Dict[int, Dict[int, int]] = defaultdict(dict)
+        # (head, terminal), (head, B, C) or, for unit chains, (head, B) -> rule
+        # number in grammar order, for forests.
+        self.rule_ids: Dict[Tuple, int] = {}
+        for head, productions in grammar.items():
+            head_bit = 1 << self.index[head]
+            for prod in productions:
+                self.rule_ids.setdefault((self.index[head],) + tuple(
+                    self.index.get(s, s) for s in prod), len(self.rule_ids))
+                if len(prod) == 1 and prod[0] not in self.index:
+                    self.terminal_heads[prod[0]] |= head_bit
+                elif len(prod) == 2 and prod[0] in self.index and prod[1] in self.index:
+                    row = self.binary[self.index[prod[0]]]
+                    right = self.index[prod[1]]
+                    row[right] = row.get(right, 0) | head_bit
+                else:
+                    raise ValueError(f"Production {head} -> {prod} is not in Chomsky Normal Form")
+
+        # Rule key (as in rule_ids) -> the nonterminal IDs of its unit chain.
+        self.unit_chains: Dict[Tuple, Tuple[int, ...]] = {}
+        for head, chains in (unit_chains or {}).items():
+            if head not in self.index:
+                continue
+            for prod, chain in chains.items():
+                key = (self.index[head],) + tuple(self.index.get(s, s) for s in prod)
+                if key in self.rule_ids and all(name in self.index for name in chain):
+                    self.unit_chains[key] = tuple(self.index[name] for name in chain)
+                    # The unit production `head -> chain[0]`, for forests.
+                    self.rule_ids.setdefault((self.index[head], self.unit_chains[key][0]), len(self.rule_ids))
+
+        # Bitset of nonterminals that occur as the left child of some binary rule.
+        self._left_mask = 0
+        # For each left child B, the bitset of right children C it combines with.
+        self._right_masks: Dict[int, int] = {}
+        for left, row in self.binary.items():
+            self._left_mask |= 1 << left
+            mask = 0
+            for right in row:
+                mask |= 1 << right
+            self._right_masks[left] = mask
+
+        self.terminals = TerminalSet(self.terminal_heads)
+
+    def _combine(self, left: int, right: int) -> int:
+        """Returns the heads A of all rules `A -> B C` with B in `left` and C in `right`."""
+        result = 0
+        for b in _bits(left & self._left_mask):
+            candidates = right & self._right_masks[b]
+            if candidates:
+                row = self.binary[b]
+                for c in _bits(candidates):
+                    result |= row[c]
+        return result
+
+    def _fill_chart(self, text: str) -> Chart:
+        """Runs the CYK dynamic program, returning the sparse chart."""
+        n = len(text)
+        chart: Chart = [{} for _ in range(n + 1)]
+        # ends[i] lists, in ascending order, every k with a non-empty chart[i][k].
+        ends: List[List[int]] = [[] for _ in range(n + 1)]
+        combined: Dict[Tuple[int, int], int] = {}
+
+        # Seed terminal spans; a literal may end several characters later.
+        seeds: List[Dict[int, int]] = [{} for _ in range(n + 1)]
+        for i in range(n):
+            for terminal, end in self.terminals.matches(text, i):
+                seeds[i][end] = seeds[i].get(end, 0) | self.terminal_heads[terminal]
+
+        for j in range(1, n + 1):
+            for i in range(j - 1, -1, -1):
+                cell = seeds[i].get(j, 0)
+                row = chart[i]
+                for k in ends[i]:
+                    right = chart[k].get(j)
+                    if not right:
+                        continue
+                    pair = (row[k], right)
+                    heads = combined.get(pair)
+                    if heads is None:
+                        heads = combined[pair] = self._combine(row[k], right)
+                    cell |= heads
+                if cell:
+                    row[j] = cell
+                    ends[i].append(j)
+        return chart
+
+    def recognize(self, text: str) -> bool:
+        """
+        Returns True if the start symbol derives `text`.
+
+        CNF grammars cannot derive the empty string, so empty input is
+        always rejected.
+        """
+        if not text or self.start_symbol not in self.index:
+            return False
+        chart = self._fill_chart(text)
+        return bool(chart[0].get(len(text), 0) >> self.index[self.start_symbol] & 1)
+
+    def parse(self, text: str) -> Optional[ASTNode]:
+        """
+        Parses `text` and recovers one derivation as an ASTNode tree.
+
+        Back-pointers are not stored while filling the chart; each split is
+        recovered on demand from the filled bitsets, which keeps the fill
+        loop tight and costs time only along the returned tree.
+
+        Returns:
+            The root node (of type `start_symbol`), or None if `text` is not
+            in the language. Nodes for rules matched by a terminal carry the
+            matched text as their value.
+        """
+        if not text or self.start_symbol not in self.index:
+            return None
+        chart = self._fill_chart(text)
+        if not chart[0].get(len(text), 0) >> self.index[self.start_symbol] & 1:
+            return None
+        root = ASTNode(self.start_symbol)
+        # Iterative depth-first reconstruction; frames are (symbol, i, j, target list).
+        stack: List[Tuple[int, int, int, List[ASTNode]]] = []
+        self._expand(self.index[self.start_symbol], 0, len(text), root, text, chart, stack)
+        while stack:
+            symbol, i, j, target = stack.pop()
+            name = self.nonterminals[symbol]
+            if self._keeps(name):
+                node = ASTNode(name)
+                target.append(node)
+                self._expand(symbol, i, j, node, text, chart, stack)
+            else:
+                # Splice helper nonterminals: their children go to the parent.
+                self._expand(symbol, i, j, None, text, chart, stack, target)
+        return root
+
+    def parse_forest(self, text: str) -> Optional[Forest]:
+        """
+        Parses `text` and returns every derivation as a shared packed forest.
+
+        Families are numbered by rule in grammar order, so
+        `Forest.prefer_rules()` favours earlier productions.
+
+        Returns:
+            The forest, or None if `text` is not in the language.
+        """
+        if not text or self.start_symbol not in self.index:
+            return None
+        chart = self._fill_chart(text)
+        if not chart[0].get(len(text), 0) >> self.index[self.start_symbol] & 1:
+            return None
+
+        nodes: Dict[Tuple, ForestNode] = {}
+        pending: List[Tuple[ForestNode, int]] = []
+
+        def node_for(symbol: int, i: int, j: int) -> ForestNode:
+            node = nodes.get((symbol, i, j))
+            if node is None:
+                node = nodes[(symbol, i, j)] = ForestNode(self.nonterminals[symbol], i, j, SYMBOL)
+                pending.append((node, symbol))
+            return node
+
+        root = node_for(self.index[self.start_symbol], 0, len(text))
+        while pending:
+            node, symbol = pending.pop()
+            i, j = node.start, node.end
+            bit = 1 << symbol
+            # Productions inlined from another rule become one unit family
+            # per rule; that rule's node has the productions themselves.
+            units: Set[int] = set()
+            for terminal, end in self.terminals.matches(text, i):
+                if end == j and self.terminal_heads[terminal] & bit:
+                    chain = self.unit_chains.get((symbol, terminal))
+                    if chain:
+                        units.add(chain[0])
+                        continue
+                    leaf = nodes.get((terminal, i, j))
+                    if leaf is None:
+                        leaf = nodes[(terminal, i, j)] = ForestNode(terminal, i, j, TERMINAL)
+                    node.families.append((self.rule_ids[(symbol, terminal)], (leaf,)))
+            for k, left in chart[i].items():
+                right = chart[k].get(j, 0) if k < j else 0
+                if not right:
+                    continue
+                for b in _bits(left & self._left_mask):
+                    for c, heads in self.binary[b].items():
+                        if heads & bit and right >> c & 1:
+                            chain = self.unit_chains.get((symbol, b, c))
+                            if chain:
+                                units.add(chain[0])
+                                continue
+                            node.families.append((self.rule_ids[(symbol, b, c)],
+                                                  (node_for(b, i, k), node_for(c, k, j))))
+            for unit in sorted(units):
+                node.families.append((self.rule_ids[(symbol, unit)], (node_for(unit, i, j),)))
+        return Forest(root, text, self._keeps)
+
+    def _keeps(self, name: str) -> bool:
+        return self.rule_names is None or name in self.rule_names
+
+    def _expand(self, symbol: int, i: int, j: int, node: Optional[ASTNode], text: str,
+                chart: Chart, stack: list, target: Optional[List[ASTNode]] = None) -> None:
+        """Finds one derivation step for `symbol` over `text[i:j]` and schedules its children."""
+        bit = 1 << symbol
+        for terminal, end in self.terminals.matches(text, i):
+            if end == j and self.terminal_heads[terminal] & bit:
+                node, target = self._open_chain(self.unit_chains.get((symbol, terminal)), node, target)
+                if node is not None:
+                    node.value = text[i:j]
+                else:
+                    # A spliced terminal rule leaves just the terminal behind.
+                    target.append(ASTNode(terminal, value=text[i:j]))
+                return
+
+        for k, left in chart[i].items():
+            if k >= j:
+                continue
+            right = chart[k].get(j, 0)
+            if not right:
+                continue
+            for b in _bits(left & self._left_mask):
+                for c, heads in self.binary[b].items():
+                    if heads & bit and right >> c & 1:
+                        node, target = self._open_chain(self.unit_chains.get((symbol, b, c)), node, target)
+                        children = node.children if node is not None else target
+                        # Push the right child first so the left one is expanded first.
+                        stack.append((c, k, j, children))
+                        stack.append((b, i, k, children))
+                        return
+        raise RuntimeError(f"No derivation for {self.nonterminals[symbol]} over [{i}, {j})")
+
+    def _open_chain(self, chain: Optional[Tuple[int, ...]], node: Optional[ASTNode],
+                    target: Optional[List[ASTNode]]) -> Tuple[Optional[ASTNode], Optional[List[ASTNode]]]:
+        """Adds the nodes of the rules a production was inlined from; returns the innermost."""
+        for symbol in chain or ():
+            name = self.nonterminals[symbol]
+            if self._keeps(name):
+                child = ASTNode(name)
+                (node.children if node is not None else target).append(child)
+                node = child
+        return node, target
+
+
+if __name__ == '__main__':
+    print("--- CYK Parser Demonstration ---")
+    from ..grammar.transformer import CNFTransformer
+
+    # Sum ::= Digit { '+' Digit } ;   Digit ::= [0-9] ;
+    digit = ASTNode('Rule', children=[
+        ASTNode('Identifier', value='Digit'),
+        ASTNode('Definition', children=[
+            ASTNode('CharRange', children=[ASTNode('HexLiteral', value='0030'), ASTNode('HexLiteral', value='0039')])
+        ])
+    ])
+    total = ASTNode('Rule', children=[
+        ASTNode('Identifier', value='Sum'),
+        ASTNode('Definition', children=[
+            ASTNode('Sequence', children=[
+                ASTNode('Identifier', value='Digit'),
+                ASTNode('Repetition', children=[
+                    ASTNode('Sequence', children=[ASTNode('Literal', value='+'), ASTNode('Identifier', value='Digit')])
+                ])
+            ])
+        ])
+    ])
+    transformer = CNFTransformer([total, digit])
+    cnf = transformer.transform()
+    parser = CYKParser(cnf, transformer.start_symbol, transformer.rule_names, transformer.unit_chains)
+
+    for sample in ("1+2+3", "1++2"):
+        print(f"'{sample}' accepted: {parser.recognize(sample)}")
+    tree = parser.parse("1+2+3")
+    print(tree)
+    assert tree is not None and tree.flatten() == "1+2+3"
+    # The last Digit is reached through a unit production; it keeps its node.
+    assert [child.term_type for child in tree.children] == ['Digit', '+', 'Digit', '+', 'Digit']
+    print("\n✅ Demonstration complete.")
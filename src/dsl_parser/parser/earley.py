@@ -0,0 +1,701 @@
+# src/dsl_parser/parser/earley.py
+"""
+An Earley parser that runs directly on EBNF-level grammars.
+
+It consumes the dictionary built by `CNFTransformer._ast_to_dict` (EBNF
+operators already expanded into helper rules, but no epsilon elimination or
+binarization), so it avoids the rule blow-up of the CNF route entirely.
+
+Two classic refinements keep it fast on the grammars this project produces:
+
+* Aycock & Horspool: when a nullable nonterminal is predicted, the predicting
+  item is also advanced past it at once, which handles empty rules without a
+  separate completion pass.
+* Joop Leo: completions walking up a deterministic right-recursive chain are
+  replaced by one memoized "transitive" item, so the right-recursive helper
+  rules generated for `{ ... }` repetitions parse in linear time. The skipped
+  chain items are only looked up when a parse tree is requested.
+
+`parse` recovers one derivation; `parse_forest` recovers all of them as a
+shared packed parse forest (see `forest.py`).
+"""
+from collections import defaultdict
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from ..core.ast import ASTNode
+from ..core.charclass import is_class_terminal
+from ..grammar.analysis import GrammarAnalysis
+from ..grammar.symbols import IntGrammar, SymbolTable
+from ..grammar.transformer import CNFTransformer, SimpleGrammar
+from .forest import INTERMEDIATE, SYMBOL, TERMINAL, Forest, ForestNode
+from .terminals import compile_matcher
+
+# An Earley item: (rule index, dot position, origin set).
+Item = Tuple[int, int, int]
+# Completion order of an item within its set; Leo-materialized items sort
+# just after the completion that triggered them.
+Order = Tuple[float, int]
+
+_AUGMENTED_START = "<start>"
+_NO_LIMIT: Order = (float('inf'), 0)
+
+
+class EarleyParser:
+    """Parses text against an EBNF-level grammar with the Earley algorithm."""
+    def __init__(self, grammar: SimpleGrammar, start_symbol: str, rule_names: Optional[Set[str]] = None):
+        """
+        Compiles a grammar dictionary into Earley tables.
+
+        Args:
+            grammar: A grammar dictionary such as `CNFTransformer(...).grammar`
+                     (before `transform()` is called). Symbols without a rule
+                     are terminals.
+            start_symbol: The nonterminal a complete parse must derive.
+            rule_names: The nonterminals to keep as nodes in parse trees;
+                        helper rules not listed are spliced into their parent.
+                        Defaults to keeping every nonterminal.
+        """
+        self.start_symbol = start_symbol
+        self.rule_names = rule_names
+
+        # Nonterminals are numbered first, so `symbol < self._n_nonterminals`
+        # tells the two kinds apart.
+        self.symbols: List[str] = [_AUGMENTED_START] + list(grammar)
+        self._n_nonterminals = len(self.symbols)
+        index: Dict[str, int] = {name: i for i, name in enumerate(self.symbols)}
+        for productions in grammar.values():
+            for prod in productions:
+                for symbol in prod:
+                    if symbol not in index:
+                        index[symbol] = len(self.symbols)
+                        self.symbols.append(symbol)
+        self.index = index
+
+        # rules[r] = (lhs, rhs); rule 0 is the augmented `<start> -> start_symbol`.
+        self.rules: List[Tuple[int, Tuple[int, ...]]] = [(0, (index.get(start_symbol, -1),))]
+        for head, productions in grammar.items():
+            for prod in productions:
+                self.rules.append((index[head], tuple(index[s] for s in prod)))
+        self.by_lhs: Dict[int, List[int]] = defaultdict(list)
+        for r, (lhs, _) in enumerate(self.rules):
+            self.by_lhs[lhs].append(r)
+
+        self.matchers = {t: compile_matcher(self.symbols[t])
+                         for t in range(self._n_nonterminals, len(self.symbols))}
+        # Characters consumed by each terminal: classes match one, literals themselves.
+        self.terminal_lengths = {t: 1 if is_class_terminal(self.symbols[t]) else len(self.symbols[t])
+                                 for t in range(self._n_nonterminals, len(self.symbols))}
+        self.nullable, self._null_rule = self._compute_nullable()
+        self.analysis, self.rule_lookahead = self._compute_lookahead()
+
+    @classmethod
+    def from_ast(cls, grammar_ast: List[ASTNode], start_symbol: Optional[str] = None) -> 'EarleyParser':
+        """
+        Builds a parser straight from ASTNode rules, skipping CNF conversion.
+
+        EBNF operators and grouped choices become helper rules, which parse
+        trees flatten away, so the language is exactly the source grammar's.
+        """
+        transformer = CNFTransformer(grammar_ast)
+        return cls(transformer.grammar, start_symbol or transformer.start_symbol, transformer.rule_names)
+
+    def _compute_nullable(self) -> Tuple[Set[int], Dict[int, int]]:
+        """
+        Finds nullable nonterminals with a worklist over rule occurrences.
+
+        Also records, for each nullable symbol, a rule whose right-hand side
+        became nullable strictly earlier, so empty subtrees can be built
+        without cycling.
+        """
+        # remaining[r] counts the right-hand-side positions of rule r not yet
+        # known to be nullable; occurrences lists one entry per position.
+        remaining = [len(rhs) for _, rhs in self.rules]
+        occurrences: Dict[int, List[int]] = defaultdict(list)
+        for r, (_, rhs) in enumerate(self.rules):
+            for symbol in rhs:
+                occurrences[symbol].append(r)
+
+        nullable: Set[int] = set()
+        null_rule: Dict[int, int] = {}
+        worklist = [r for r, count in enumerate(remaining) if count == 0]
+        while worklist:
+            r = worklist.pop()
+            lhs = self.rules[r][0]
+            if lhs in nullable:
+                continue
+            nullable.add(lhs)
+            null_rule[lhs] = r
+            for user in occurrences[lhs]:
+                remaining[user] -= 1
+                if remaining[user] == 0:
+                    worklist.append(user)
+        return nullable, null_rule
+
+    def _compute_lookahead(self) -> Tuple[GrammarAnalysis, List[int]]:
+        """
+        Computes, for every rule, the terminals that can come first once it
+        is predicted: FIRST of its right-hand side, plus FOLLOW of its
+        left-hand side if that can be empty. Prediction skips rules whose
+        set misses every terminal that can begin at the current position.
+        """
+        rule_grammar: IntGrammar = {symbol: [] for symbol in range(self._n_nonterminals)}
+        for lhs, rhs in self.rules:
+            if all(s >= 0 for s in rhs):
+                rule_grammar[lhs].append(rhs)
+        analysis = GrammarAnalysis(rule_grammar, SymbolTable(self.symbols), 0)
+        lookahead: List[int] = []
+        for lhs, rhs in self.rules:
+            if any(s < 0 for s in rhs):
+                lookahead.append(0)
+                continue
+            bits, nullable = analysis.first_of(rhs)
+            lookahead.append(bits | analysis.follow[lhs] if nullable else bits)
+        return analysis, lookahead
+
+    def recognize(self, text: str) -> bool:
+        """Returns True if the start symbol derives `text`."""
+        return _Chart(self, text).run()
+
+    def parse(self, text: str) -> Optional[ASTNode]:
+        """
+        Parses `text` and returns one derivation as an ASTNode tree.
+
+        Returns:
+            The root node (of type `start_symbol`), or None if `text` is not
+            in the language.
+        """
+        chart = _Chart(self, text)
+        if not chart.run():
+            return None
+        return chart.build_tree()
+
+    def parse_forest(self, text: str) -> Optional[Forest]:
+        """
+        Parses `text` and returns every derivation as a shared packed forest.
+
+        Families are numbered by rule, in grammar order, so
+        `Forest.prefer_rules()` favours earlier alternatives.
+
+        Returns:
+            The forest, or None if `text` is not in the language.
+        """
+        chart = _Chart(self, text)
+        if not chart.run():
+            return None
+        return chart.build_forest()
+
+    def _keeps(self, name: str) -> bool:
+        return self.rule_names is None or name in self.rule_names
+
+
+class _Chart:
+    """The Earley sets for one input, plus the bookkeeping for Leo items."""
+    def __init__(self, parser: EarleyParser, text: str):
+        self.parser = parser
+        self.text = text
+        n = len(text)
+        self.items: List[List[Item]] = [[] for _ in range(n + 1)]
+        self.seen: List[Set[Item]] = [set() for _ in range(n + 1)]
+        # waiting[i][B] = items in set i with B right after the dot.
+        self.waiting: List[Dict[int, List[Item]]] = [defaultdict(list) for _ in range(n + 1)]
+        # leo[(j, B)] = (top item, chain link) or None, memoized per finished set.
+        self.leo: Dict[Tuple[int, int], Optional[Tuple[Item, Item]]] = {}
+        # leo_uses[i] = [(origin, symbol, order of the completion that used it)]
+        self.leo_uses: List[List[Tuple[int, int, int]]] = [[] for _ in range(n + 1)]
+        # Direct completions per set, as symbol -> origin -> [(order, rule)].
+        self._direct: Dict[int, Dict[int, Dict[int, List[Tuple[Order, int]]]]] = {}
+        self._leo_depth: Optional[Dict[Tuple[int, int], int]] = None
+        self._positions: Optional[Dict[Item, List[int]]] = None
+
+    def _add(self, i: int, item: Item) -> None:
+        if item not in self.seen[i]:
+            self.seen[i].add(item)
+            self.items[i].append(item)
+
+    def run(self) -> bool:
+        """Fills every Earley set; returns True if the input is accepted."""
+        parser = self.parser
+        rules = parser.rules
+        n_nt = parser._n_nonterminals
+        text = self.text
+        n = len(text)
+        if rules[0][1][0] < 0:
+            return False
+        self._add(0, (0, 0, 0))
+
+        analysis = parser.analysis
+        rule_lookahead = parser.rule_lookahead
+        for i in range(n + 1):
+            items = self.items[i]
+            waiting = self.waiting[i]
+            lookahead = analysis.lookahead(text, i)
+            scans: Dict[int, List[Item]] = defaultdict(list)
+            k = 0
+            while k < len(items):
+                rule, dot, origin = items[k]
+                lhs, rhs = rules[rule]
+                if dot == len(rhs):
+                    if origin < i:
+                        self._complete(lhs, origin, i, k)
+                    # origin == i: the symbol is nullable, and every item
+                    # waiting on it here was already advanced at prediction.
+                else:
+                    symbol = rhs[dot]
+                    if symbol < n_nt:
+                        first_wait = symbol not in waiting
+                        waiting[symbol].append((rule, dot, origin))
+                        if first_wait:
+                            for predicted in parser.by_lhs[symbol]:
+                                if rule_lookahead[predicted] & lookahead:
+                                    self._add(i, (predicted, 0, i))
+                        if symbol in parser.nullable:
+                            self._add(i, (rule, dot + 1, origin))
+                    else:
+                        scans[symbol].append((rule, dot, origin))
+                k += 1
+
+            for terminal, scanned in scans.items():
+                end = parser.matchers[terminal](text, i)
+                if end > i:
+                    for rule, dot, origin in scanned:
+                        self._add(end, (rule, dot + 1, origin))
+
+        return (0, 1, 0) in self.seen[n]
+
+    def _complete(self, symbol: int, origin: int, i: int, order: int) -> None:
+        """Advances the items in set `origin` that wait on a completed `symbol`."""
+        leo = self._leo_item(origin, symbol)
+        if leo is not None:
+            self._add(i, leo[0])
+            self.leo_uses[i].append((origin, symbol, order))
+            return
+        for rule, dot, item_origin in self.waiting[origin].get(symbol, ()):
+            self._add(i, (rule, dot + 1, item_origin))
+
+    def _leo_item(self, j: int, symbol: int) -> Optional[Tuple[Item, Item]]:
+        """
+        Returns the memoized Leo item for `symbol` in finished set `j`.
+
+        A Leo item exists when exactly one item in set `j` waits on `symbol`
+        and `symbol` is the last symbol of its rule. Its value is the topmost
+        item of the deterministic chain of completions that would follow,
+        together with the first link of that chain.
+        """
+        # Walk up the chain until a memoized or chain-ending set is found,
+        # then fill in the memo for every step on the way back down.
+        pending: List[Tuple[Tuple[int, int], Item]] = []
+        key = (j, symbol)
+        top: Optional[Item] = None
+        while True:
+            if key in self.leo:
+                memo = self.leo[key]
+                top = memo[0] if memo else None
+                break
+            self.leo[key] = None  # guards against cycles through the same set
+            waiting = self.waiting[key[0]].get(key[1], ())
+            if len(waiting) != 1:
+                break
+            rule, dot, origin = waiting[0]
+            lhs, rhs = self.parser.rules[rule]
+            if dot + 1 != len(rhs):
+                break
+            link = (rule, dot + 1, origin)
+            pending.append((key, link))
+            if lhs == 0:
+                break
+            key = (origin, lhs)
+
+        for step_key, link in reversed(pending):
+            if top is None:
+                top = link
+            self.leo[step_key] = (top, link)
+        return self.leo[(j, symbol)]
+
+    # --- Tree construction -------------------------------------------------
+
+    def _completed(self, e: int, symbol: int) -> '_Completions':
+        """Returns the items of set `e` that completed `symbol`, by origin."""
+        index = self._direct.get(e)
+        if index is None:
+            rules = self.parser.rules
+            index = self._direct[e] = defaultdict(lambda: defaultdict(list))
+            for position, (rule, dot, origin) in enumerate(self.items[e]):
+                if dot == len(rules[rule][1]):
+                    index[rules[rule][0]][origin].append(((position, 0), rule))
+        uses = [((origin, used), order) for origin, used, order in self.leo_uses[e]]
+        return _Completions(self, symbol, index.get(symbol, {}), uses)
+
+    def _leo_tree(self) -> None:
+        """
+        Arranges the memoized Leo items into a forest, once per chart.
+
+        A key's parent is the key its chain link completes, so the items one
+        Leo completion skipped are the links of a key and its ancestors.
+        Depths and DFS entry/exit numbers then find a skipped item without
+        walking the chain.
+        """
+        rules = self.parser.rules
+        children: Dict[Tuple[int, int], List[Tuple[int, int]]] = defaultdict(list)
+        roots: List[Tuple[int, int]] = []
+        by_completion: Dict[Tuple[int, int], List[Tuple[int, int]]] = defaultdict(list)
+        for key, memo in self.leo.items():
+            if memo is None:
+                continue
+            top, link = memo
+            completes = (link[2], rules[link[0]][0])
+            by_completion[completes].append(key)
+            if link != top and self.leo.get(completes) is not None:
+                children[completes].append(key)
+            else:
+                roots.append(key)
+        depth: Dict[Tuple[int, int], int] = {}
+        enter: Dict[Tuple[int, int], int] = {}
+        leave: Dict[Tuple[int, int], int] = {}
+        clock = 0
+        for root in roots:
+            depth[root] = 0
+            stack = [(root, False)]
+            while stack:
+                key, done = stack.pop()
+                if done:
+                    leave[key] = clock
+                    continue
+                enter[key] = clock
+                clock += 1
+                stack.append((key, True))
+                for child in children.get(key, ()):
+                    if child not in depth:
+                        depth[child] = depth[key] + 1
+                        stack.append((child, False))
+        self._leo_depth, self._leo_enter, self._leo_leave = depth, enter, leave
+        self._leo_by_completion = by_completion
+
+    def _leo_skipped(self, uses: List[Tuple[Tuple[int, int], int]],
+                     completion: Tuple[int, int]) -> List[Tuple[Order, int]]:
+        """
+        Finds the items completing `completion` (origin, symbol) that Leo
+        `uses` skipped, ranked just after the completion that used each chain.
+        """
+        if not uses:
+            return []
+        if self._leo_depth is None:
+            self._leo_tree()
+        depth, enter, leave = self._leo_depth, self._leo_enter, self._leo_leave
+        found = []
+        for key in self._leo_by_completion.get(completion, ()):
+            if key not in enter:
+                continue
+            for used, order in uses:
+                if enter[key] <= enter.get(used, -1) < leave[key]:
+                    found.append(((order, depth[used] - depth[key] + 1), self.leo[key][1][0]))
+        return found
+
+    def _leo_path(self, used: Tuple[int, int]) -> Iterator[Tuple[int, int]]:
+        """Yields the (origin, symbol) completions skipped by a Leo use, bottom up."""
+        rules = self.parser.rules
+        key: Optional[Tuple[int, int]] = used
+        while key is not None:
+            top, link = self.leo[key]
+            completes = (link[2], rules[link[0]][0])
+            yield completes
+            key = completes if link != top and self.leo.get(completes) is not None else None
+
+    def build_tree(self) -> ASTNode:
+        """Recovers one derivation of the whole input as an ASTNode tree."""
+        parser = self.parser
+        root = ASTNode(parser.start_symbol)
+        if not self.text:
+            empty: List[ASTNode] = []
+            self._emit_empty(parser.index[parser.start_symbol], empty)
+            root.children = empty[0].children if empty and empty[0].term_type == parser.start_symbol else empty
+            return root
+        # Frames: (symbol, start, end, order limit, target list). The limit
+        # keeps same-span unit chains from cycling: a child covering its
+        # parent's whole span must have been completed before the parent.
+        stack: List[Tuple[int, int, int, Order, List[ASTNode]]] = [
+            (parser.index[parser.start_symbol], 0, len(self.text), _NO_LIMIT, root.children)]
+        is_root = True
+        while stack:
+            frame = stack.pop()
+            symbol, start, end, limit, target = frame
+            if symbol >= parser._n_nonterminals:
+                target.append(ASTNode(parser.symbols[symbol], value=self.text[start:end]))
+                continue
+            if start == end:
+                self._emit_empty(symbol, target)
+                continue
+
+            choice = self._choose(symbol, start, end, limit)
+            if choice is None:
+                raise RuntimeError(f"No derivation for {parser.symbols[symbol]} over [{start}, {end})")
+            rule, children = choice
+
+            name = parser.symbols[symbol]
+            if is_root:
+                node, is_root = root, False
+            elif parser.rule_names is None or name in parser.rule_names:
+                node = ASTNode(name)
+                target.append(node)
+            else:
+                node = None
+            if node is not None:
+                rhs = parser.rules[rule][1]
+                if len(rhs) == 1 and rhs[0] >= parser._n_nonterminals:
+                    node.value = self.text[start:end]
+                    continue
+                target = node.children
+            for child in reversed(children):
+                stack.append(child + (target,))
+        return root
+
+    def build_forest(self) -> Forest:
+        """
+        Builds the shared packed forest of the whole input from the chart.
+
+        Nodes are created on first reference and expanded from a worklist.
+        A symbol node over a non-empty span takes its rules from the
+        completed items; over an empty span, from the grammar's all-nullable
+        rules. A family splits off the rule's last symbol at every point
+        where the prefix item exists, so every family is a real derivation.
+        """
+        parser = self.parser
+        rules = parser.rules
+        n_nt = parser._n_nonterminals
+        nodes: Dict[Tuple[int, ...], ForestNode] = {}
+        pending: List[Tuple[ForestNode, int, int]] = []
+
+        def symbol_node(symbol: int, start: int, end: int) -> ForestNode:
+            key = (symbol, start, end)
+            node = nodes.get(key)
+            if node is None:
+                kind = SYMBOL if symbol < n_nt else TERMINAL
+                node = nodes[key] = ForestNode(parser.symbols[symbol], start, end, kind)
+                if kind == SYMBOL:
+                    pending.append((node, symbol, -1))
+            return node
+
+        def prefix_node(rule: int, dot: int, start: int, end: int) -> ForestNode:
+            key = (-1, rule, dot, start, end)
+            node = nodes.get(key)
+            if node is None:
+                node = nodes[key] = ForestNode(parser.symbols[rules[rule][0]], start, end, INTERMEDIATE)
+                pending.append((node, rule, dot))
+            return node
+
+        def families(rule: int, dot: int, start: int, end: int) -> List[Tuple[int, Tuple[ForestNode, ...]]]:
+            """The ways `rhs[:dot]` of `rule` derives `text[start:end]`."""
+            rhs = rules[rule][1]
+            if dot == 0:
+                return [(rule, ())] if start == end else []
+            symbol = rhs[dot - 1]
+            if symbol >= n_nt:
+                left = self._terminal_start(symbol, end)
+                splits = [left] if left >= start else []
+            elif start == end:
+                splits = [start]
+            else:
+                # Enumerate whichever side is smaller, as `_split` does.
+                completed = self._completed(end, symbol)
+                prefix_sets = self._item_positions().get((rule, dot - 1, start), ()) if dot > 1 else ()
+                if len(prefix_sets) <= len(completed):
+                    splits = [k for k in prefix_sets if start < k < end and k in completed]
+                else:
+                    splits = [k for k in completed if start < k < end]
+                if start in completed:
+                    splits.append(start)
+                if symbol in parser.nullable:
+                    splits.append(end)
+            result = []
+            for k in sorted(splits):
+                if dot == 1:
+                    if k != start:
+                        continue
+                elif k == start:
+                    if any(s not in parser.nullable for s in rhs[:dot - 1]):
+                        continue
+                elif (rule, dot - 1, start) not in self.seen[k]:
+                    continue
+                right = symbol_node(symbol, k, end)
+                if dot == 1:
+                    result.append((rule, (right,)))
+                else:
+                    result.append((rule, (prefix_node(rule, dot - 1, start, k), right)))
+            return result
+
+        root = symbol_node(parser.index[parser.start_symbol], 0, len(self.text))
+        while pending:
+            node, label, dot = pending.pop()
+            if node.kind == INTERMEDIATE:
+                node.families = families(label, dot, node.start, node.end)
+                continue
+            if node.start == node.end:
+                candidates = [r for r in parser.by_lhs[label]
+                              if all(s in parser.nullable for s in rules[r][1])]
+            else:
+                candidates = sorted(r for _, r in self._completed(node.end, label).get(node.start, ()))
+            for rule in candidates:
+                node.families.extend(families(rule, len(rules[rule][1]), node.start, node.end))
+        return Forest(root, self.text, parser._keeps)
+
+    def _item_positions(self) -> Dict[Item, List[int]]:
+        """Maps every item to the ascending list of sets that contain it."""
+        if self._positions is None:
+            positions: Dict[Item, List[int]] = defaultdict(list)
+            for i, items in enumerate(self.items):
+                for item in items:
+                    positions[item].append(i)
+            self._positions = positions
+        return self._positions
+
+    def _choose(self, symbol: int, start: int, end: int, limit: Order):
+        """Picks the earliest-completed rule for `symbol` over the span and splits it."""
+        for rank, rule in self._completed(end, symbol).get(start, ()):
+            if rank >= limit:
+                break
+            children = self._split(rule, start, end, rank)
+            if children is not None:
+                return rule, children
+        return None
+
+    def _split(self, rule: int, start: int, end: int, rank: Order):
+        """
+        Finds child spans for a completed rule over `text[start:end]`.
+
+        Works right to left: each child must end where the next one starts,
+        and the item with the dot before it must exist in the set where it
+        begins, which guarantees the remaining prefix is derivable.
+        """
+        parser = self.parser
+        rhs = parser.rules[rule][1]
+        children: List[Tuple[int, int, int, Order]] = [None] * len(rhs)  # type: ignore[list-item]
+
+        def search(p: int, right: int) -> bool:
+            if p < 0:
+                return right == start
+            symbol = rhs[p]
+            if symbol >= parser._n_nonterminals:
+                left = self._terminal_start(symbol, right)
+                if left >= start and (rule, p, start) in self.seen[left]:
+                    children[p] = (symbol, left, right, _NO_LIMIT)
+                    return search(p - 1, left)
+                return False
+            # Candidate starts: where the prefix item exists and `symbol`
+            # completes at `right`. Enumerate whichever side is smaller.
+            completed = self._completed(right, symbol)
+            prefix_sets = self._item_positions().get((rule, p, start), ())
+            if len(prefix_sets) <= len(completed):
+                lefts = [m for m in reversed(prefix_sets) if m < right and m in completed]
+            else:
+                lefts = sorted((m for m in completed if (rule, p, start) in self.seen[m]), reverse=True)
+            if symbol in parser.nullable and (rule, p, start) in self.seen[right]:
+                lefts.insert(0, right)
+            for left in lefts:
+                if left < start:
+                    continue
+                if left == start and right == end:
+                    # A child spanning the whole parent must precede it.
+                    candidates = completed.get(left, ())
+                    if not candidates or candidates[0][0] >= rank:
+                        continue
+                    children[p] = (symbol, left, right, rank)
+                else:
+                    children[p] = (symbol, left, right, _NO_LIMIT)
+                if search(p - 1, left):
+                    return True
+            return False
+
+        return children if search(len(rhs) - 1, end) else None
+
+    def _terminal_start(self, terminal: int, end: int) -> int:
+        """Returns where `terminal` must start to end at `end`, or -1."""
+        left = end - self.parser.terminal_lengths[terminal]
+        if left >= 0 and self.parser.matchers[terminal](self.text, left) == end:
+            return left
+        return -1
+
+    def _emit_empty(self, symbol: int, target: List[ASTNode]) -> None:
+        """Appends the empty derivation of a nullable symbol to `target`."""
+        parser = self.parser
+        stack = [(symbol, target)]
+        while stack:
+            current, out = stack.pop()
+            name = parser.symbols[current]
+            if parser.rule_names is None or name in parser.rule_names:
+                node = ASTNode(name)
+                out.append(node)
+                out = node.children
+            for child in reversed(parser.rules[parser._null_rule[current]][1]):
+                stack.append((child, out))
+
+
+class _Completions:
+    """
+    The items of one Earley set that completed one symbol, by origin.
+
+    Direct completions are indexed per set; those skipped by Leo items are
+    looked up in the chart's Leo forest per query, so a long right-recursive
+    chain is never walked once per set.
+    """
+    __slots__ = ('chart', 'symbol', 'direct', 'uses')
+
+    def __init__(self, chart: _Chart, symbol: int, direct: Dict[int, List[Tuple[Order, int]]],
+                 uses: List[Tuple[Tuple[int, int], int]]):
+        self.chart = chart
+        self.symbol = symbol
+        self.direct = direct
+        self.uses = uses
+
+    def get(self, origin: int, default=()) -> List[Tuple[Order, int]]:
+        """The (order, rule) pairs completing the symbol from `origin`, earliest first."""
+        direct = self.direct.get(origin)
+        skipped = self.chart._leo_skipped(self.uses, (origin, self.symbol))
+        if not skipped:
+            return direct if direct is not None else default
+        best: Dict[int, Order] = {}
+        for rank, rule in list(direct or ()) + skipped:
+            if rank < best.get(rule, _NO_LIMIT):
+                best[rule] = rank
+        return sorted((rank, rule) for rule, rank in best.items())
+
+    def __contains__(self, origin: int) -> bool:
+        return origin in self.direct or bool(self.chart._leo_skipped(self.uses, (origin, self.symbol)))
+
+    def __len__(self) -> int:
+        # An upper bound on Leo chains (their links complete various
+        # symbols), which is all choosing the smaller side needs.
+        if self.uses and self.chart._leo_depth is None:
+            self.chart._leo_tree()
+        depth = self.chart._leo_depth or {}
+        return len(self.direct) + sum(depth.get(used, 0) + 1 for used, _ in self.uses)
+
+    def __iter__(self) -> Iterator[int]:
+        origins = set(self.direct)
+        for used, _ in self.uses:
+            origins.update(origin for origin, symbol in self.chart._leo_path(used) if symbol == self.symbol)
+        return iter(origins)
+
+
+if __name__ == '__main__':
+    print("--- Earley Parser Demonstration ---")
+    from ..grammar.bootstrap import get_bootstrap_grammar
+
+    # Complete the bootstrap grammar with toy token rules so it can run.
+    token_rules = [
+        ASTNode('Rule', children=[
+            ASTNode('Identifier', value='Identifier'),
+            ASTNode('Definition', children=[ASTNode('Choice', children=[
+                ASTNode('Literal', value='A'), ASTNode('Literal', value='B')])])
+        ]),
+        ASTNode('Rule', children=[
+            ASTNode('Identifier', value='QuotedString'),
+            ASTNode('Definition', children=[ASTNode('Literal', value="'x'")])
+        ]),
+    ]
+    parser = EarleyParser.from_ast(get_bootstrap_grammar() + token_rules)
+
+    source = "A::=B'x'|A;B::=A;"
+    print(f"'{source}' accepted: {parser.recognize(source)}")
+    tree = parser.parse(source)
+    print(tree)
+    assert tree is not None and tree.flatten() == source
+    print("\n✅ Demonstration complete.")
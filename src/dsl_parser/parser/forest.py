@@ -0,0 +1,264 @@
+# src/dsl_parser/parser/forest.py
+"""
+A shared packed parse forest (SPPF) for ambiguous parses.
+
+Every derivation of an input is represented at once: there is exactly one
+symbol node per (symbol, start, end), and each way of deriving it is one
+packed family under that node. Rules longer than two symbols are split
+into intermediate nodes per (rule, dot, start, end), as in Scott's binarized
+SPPFs, so a rule's children never multiply out: the forest stays cubic in
+the input length however ambiguous the grammar, while the number of trees
+it stands for may grow exponentially.
+
+Trees are only built on request. `Forest.trees()` enumerates them lazily,
+one `ASTNode` tree at a time; `prefer_rules` and `prefer_longest` prune
+families in place to resolve the common kinds of ambiguity cheaply, before
+any tree is built.
+"""
+import math
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from ..core.ast import ASTNode
+
+SYMBOL, INTERMEDIATE, TERMINAL = 0, 1, 2
+
+
+class ForestNode:
+    """A symbol, intermediate or terminal node of a parse forest."""
+    __slots__ = ('label', 'start', 'end', 'kind', 'families')
+
+    def __init__(self, label: str, start: int, end: int, kind: int):
+        self.label = label
+        self.start = start
+        self.end = end
+        self.kind = kind
+        # One (rule, children) pair per derivation. Children are one or two
+        # nodes (or none for an empty rule); a leading intermediate node
+        # stands for all the children before the last one.
+        self.families: List[Tuple[int, Tuple['ForestNode', ...]]] = []
+
+    def __repr__(self) -> str:
+        kind = ('symbol', 'intermediate', 'terminal')[self.kind]
+        return f"ForestNode({self.label!r}, {self.start}, {self.end}, {kind}, families={len(self.families)})"
+
+
+class Forest:
+    """The parse forest of one input, with lazy tree enumeration."""
+    def __init__(self, root: ForestNode, text: str, keep: Callable[[str], bool]):
+        """
+        Args:
+            root: The start symbol's node spanning the whole input.
+            text: The input, for the values of terminal leaves.
+            keep: Whether a symbol gets its own node in enumerated trees;
+                  the children of other (helper) symbols are spliced into
+                  their parent, as in the parsers' single-tree output.
+        """
+        self.root = root
+        self.text = text
+        self.keep = keep
+
+    def nodes(self) -> Iterator[ForestNode]:
+        """Yields every node reachable from the root once."""
+        seen: Set[int] = {id(self.root)}
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            yield node
+            for _, children in node.families:
+                for child in children:
+                    if id(child) not in seen:
+                        seen.add(id(child))
+                        stack.append(child)
+
+    @property
+    def size(self) -> int:
+        """The number of nodes plus packed families; bounds the forest's memory."""
+        return sum(1 + len(node.families) for node in self.nodes())
+
+    def is_ambiguous(self) -> bool:
+        return any(len(node.families) > 1 for node in self.nodes())
+
+    def count_trees(self) -> Union[int, float]:
+        """
+        Counts the derivations the forest represents, without building them.
+
+        Returns:
+            The count, or `math.inf` if the forest has a cycle (a symbol that
+            derives itself over the same span). `trees()` then yields only
+            the derivations that never repeat a node along a path.
+        """
+        counts: Dict[int, int] = {}
+        in_progress: Set[int] = set()
+        stack: List[Tuple[ForestNode, bool]] = [(self.root, False)]
+        while stack:
+            node, done = stack.pop()
+            key = id(node)
+            if done:
+                total = 0
+                for _, children in node.families:
+                    product = 1
+                    for child in children:
+                        product *= counts[id(child)]
+                    total += product
+                counts[key] = total if node.kind != TERMINAL else 1
+                in_progress.discard(key)
+                continue
+            if key in counts:
+                continue
+            if key in in_progress:
+                return math.inf
+            in_progress.add(key)
+            stack.append((node, True))
+            for _, children in node.families:
+                stack.extend((child, False) for child in children if id(child) not in counts)
+        return counts[id(self.root)]
+
+    # --- Disambiguation ----------------------------------------------------
+
+    def prefer_rules(self, priority: Optional[Callable[[int], int]] = None) -> 'Forest':
+        """
+        Keeps, at every symbol node, only the families of its best rule.
+
+        Args:
+            priority: Maps a rule number to its rank, lower winning. Defaults
+                      to the rule number, i.e. the order of the alternatives
+                      in the grammar, like an ordered choice.
+
+        Returns:
+            This forest, pruned in place.
+        """
+        rank = priority or (lambda rule: rule)
+        for node in list(self.nodes()):
+            if node.kind == SYMBOL and len(node.families) > 1:
+                best = min(rank(rule) for rule, _ in node.families)
+                node.families = [family for family in node.families if rank(family[0]) == best]
+        return self
+
+    def prefer_longest(self) -> 'Forest':
+        """
+        Keeps, at every node, only the families whose leading children span
+        the most input, so repeated and juxtaposed items match greedily from
+        the left (`factor, { factor }` takes as much as it can first).
+
+        Returns:
+            This forest, pruned in place.
+        """
+        for node in list(self.nodes()):
+            if len(node.families) > 1:
+                def split(family: Tuple[int, Tuple[ForestNode, ...]]) -> int:
+                    children = family[1]
+                    return children[-1].start if children else node.start
+                best = max(split(family) for family in node.families)
+                node.families = [family for family in node.families if split(family) == best]
+        return self
+
+    # --- Enumeration -------------------------------------------------------
+
+    def trees(self) -> Iterator[ASTNode]:
+        """
+        Yields the derivations as ASTNode trees, one at a time.
+
+        A derivation is fixed by the family picked at each ambiguous node it
+        visits, in visiting order; the choices are advanced like an odometer,
+        so memory stays proportional to one tree and the forest.
+        """
+        forced: List[int] = []
+        while True:
+            choices: List[Tuple[int, int]] = []
+            tree = self._build(forced, choices)
+            if tree is not None:
+                yield tree
+            while choices and choices[-1][0] + 1 >= choices[-1][1]:
+                choices.pop()
+            if not choices:
+                return
+            forced = [index for index, _ in choices]
+            forced[-1] += 1
+
+    def first_tree(self) -> Optional[ASTNode]:
+        return next(self.trees(), None)
+
+    def _build(self, forced: List[int], choices: List[Tuple[int, int]]) -> Optional[ASTNode]:
+        """
+        Builds the tree for a prefix of family choices, defaulting to the
+        first family after it, and records every choice made.
+
+        Returns:
+            The tree, or None if the choices lead into a cycle.
+        """
+        text = self.text
+        root = ASTNode(self.root.label)
+        on_path: Set[int] = set()
+        # Frames: (node, target list, is the root); node None closes node `target`.
+        stack: List[Tuple[Optional[ForestNode], object, bool]] = [(self.root, root.children, True)]
+        while stack:
+            node, target, is_root = stack.pop()
+            if node is None:
+                on_path.discard(target)  # type: ignore[arg-type]
+                continue
+            if node.kind == TERMINAL:
+                target.append(ASTNode(node.label, value=text[node.start:node.end]))  # type: ignore[union-attr]
+                continue
+            if id(node) in on_path or not node.families:
+                return None
+            index = 0
+            if len(node.families) > 1:
+                index = forced[len(choices)] if len(choices) < len(forced) else 0
+                choices.append((index, len(node.families)))
+            _, children = node.families[index]
+
+            if node.kind == SYMBOL:
+                ast: Optional[ASTNode] = None
+                if is_root:
+                    ast = root
+                elif self.keep(node.label):
+                    ast = ASTNode(node.label)
+                    target.append(ast)  # type: ignore[union-attr]
+                if ast is not None:
+                    if len(children) == 1 and children[0].kind == TERMINAL:
+                        ast.value = text[node.start:node.end]
+                        continue
+                    target = ast.children
+            on_path.add(id(node))
+            stack.append((None, id(node), False))
+            for child in reversed(children):
+                stack.append((child, target, False))
+        return root
+
+
+if __name__ == '__main__':
+    print("--- Parse Forest Demonstration ---")
+    from ..grammar.transformer import CNFTransformer
+    from .cyk import CYKParser
+    from .earley import EarleyParser
+
+    # Sum = Sum, '+', Sum | Digit ;  every bracketing of a sum is a parse.
+    def rule(name: str, expression: ASTNode) -> ASTNode:
+        return ASTNode('Rule', children=[ASTNode('Identifier', value=name),
+                                         ASTNode('Definition', children=[expression])])
+    grammar = [
+        rule('Sum', ASTNode('Choice', children=[
+            ASTNode('Sequence', children=[ASTNode('Identifier', value='Sum'), ASTNode('Literal', value='+'),
+                                          ASTNode('Identifier', value='Sum')]),
+            ASTNode('Identifier', value='Digit')])),
+        rule('Digit', ASTNode('CharRange', children=[ASTNode('HexLiteral', value='0030'),
+                                                     ASTNode('HexLiteral', value='0039')])),
+    ]
+    earley = EarleyParser.from_ast(grammar)
+    transformer = CNFTransformer(grammar)
+    cyk = CYKParser(transformer.transform(), 'Sum', transformer.rule_names, transformer.unit_chains)
+
+    for terms in (4, 8, 16):
+        text = "+".join(str(i % 10) for i in range(terms))
+        for name, parser in (('Earley', earley), ('CYK', cyk)):
+            forest = parser.parse_forest(text)
+            assert forest is not None
+            print(f"{name:6} {terms:2} terms: {forest.count_trees()} trees in a forest of size {forest.size}")
+
+    forest = earley.parse_forest("1+2+3")
+    assert [tree.flatten() for tree in forest.trees()] == ["1+2+3", "1+2+3"]
+    print(next(forest.trees()))
+    assert forest.prefer_longest().count_trees() == 1
+    print("Longest match keeps the left-nested bracketing:")
+    print(forest.first_tree())
+    print("\n✅ Demonstration complete.")
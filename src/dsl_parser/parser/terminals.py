@@ -0,0 +1,74 @@
+# src/dsl_parser/parser/terminals.py
+"""
+Compiles grammar terminal symbols into matchers over the input text.
+
+A terminal in a grammar dictionary is either a character class in the
+`#xNNNN` / `[#xNNNN-#xNNNN...]` notation (matching exactly one character) or
+a literal string (matching itself). Parsers ask a TerminalSet for every
+terminal that matches at a position, so the literal lookup is keyed by the
+first character instead of testing every literal at every position.
+"""
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+from ..core.charclass import CharClass, is_class_terminal
+
+# A matcher returns the end of its terminal matched at `pos`, or -1.
+Matcher = Callable[[str, int], int]
+
+
+def compile_matcher(symbol: str) -> Matcher:
+    """Builds a matcher function for a single terminal symbol."""
+    if is_class_terminal(symbol):
+        char_class = CharClass.parse(symbol)
+        def match_class(text: str, pos: int) -> int:
+            return pos + 1 if pos < len(text) and text[pos] in char_class else -1
+        return match_class
+
+    length = len(symbol)
+    def match_literal(text: str, pos: int) -> int:
+        return pos + length if length and text.startswith(symbol, pos) else -1
+    return match_literal
+
+
+class TerminalSet:
+    """An index of terminal symbols for fast per-position matching."""
+    def __init__(self, terminals: Iterable[str]):
+        """
+        Initializes the terminal index.
+
+        Args:
+            terminals: The terminal symbols of a grammar. Empty literals are
+                       ignored, since no parser consumes zero characters
+                       through a terminal.
+        """
+        self.classes: List[Tuple[str, CharClass]] = []
+        self.literals_by_first: Dict[str, List[str]] = defaultdict(list)
+        for symbol in sorted(set(terminals)):
+            if is_class_terminal(symbol):
+                self.classes.append((symbol, CharClass.parse(symbol)))
+            elif symbol:
+                self.literals_by_first[symbol[0]].append(symbol)
+        self.max_literal_length = max(
+            (len(s) for group in self.literals_by_first.values() for s in group), default=1)
+
+    def matches(self, text: str, pos: int) -> Iterator[Tuple[str, int]]:
+        """
+        Yields every terminal that matches `text` at `pos`.
+
+        Yields:
+            (terminal, end) pairs, where `text[pos:end]` is the matched span.
+        """
+        if pos >= len(text):
+            return
+        char = text[pos]
+        for symbol, char_class in self.classes:
+            if char in char_class:
+                yield symbol, pos + 1
+        for symbol in self.literals_by_first.get(char, ()):
+            if text.startswith(symbol, pos):
+                yield symbol, pos + len(symbol)
+
+    def match(self, symbol: str, text: str, pos: int) -> int:
+        """Returns the end of `symbol` matched at `pos`, or -1 if it does not match."""
+        return compile_matcher(symbol)(text, pos)
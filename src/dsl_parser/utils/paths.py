@@ -0,0 +1,18 @@
+# src/dsl_parser/utils/paths.py
+"""
+Locations of the on-disk caches shared by the package's modules.
+"""
+import os
+
+
+def default_cache_dir(kind: str) -> str:
+    """
+    Returns the directory for one kind of cache file.
+
+    The base is `DSL_PARSER_CACHE_DIR`, or `~/.cache/dsl_parser` when that
+    is unset; each kind (`ucd`, `grammars`, ...) gets a subdirectory of it.
+    """
+    base = os.environ.get("DSL_PARSER_CACHE_DIR")
+    if not base:
+        base = os.path.join(os.path.expanduser("~"), ".cache", "dsl_parser")
+    return os.path.join(base, kind)
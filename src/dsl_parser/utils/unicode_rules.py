@@ -2,75 +2,261 @@
 """
 Generates foundational Unicode grammar rules from the Unicode Character Database.
 """
-import requests
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import sys
+from array import array
 from collections import defaultdict
-from typing import Dict, List, Union, Tuple
+from typing import Dict, Iterable, List, Optional, Union, Tuple
 
 from ..core.ast import ASTNode
+from ..core.charclass import CharClass
+from .paths import default_cache_dir
 
 # --- Type Aliases for Readability ---
-RangeTuple = Tuple[str, int, int]
-Production = List[Union[str, RangeTuple]]
+Production = List[Union[str, CharClass]]
 IntermediateGrammar = Dict[str, List[Production]]
+CategoryRanges = Dict[str, List[Tuple[int, int]]]
 
-def _fetch_and_process_data() -> Dict[str, List[int]]:
-    """Fetches UnicodeData.txt and groups code points by General Category."""
-    url = "https://www.unicode.org/Public/UCD/latest/ucd/UnicodeData.txt"
+logger = logging.getLogger(__name__)
+
+UCD_URL = "https://www.unicode.org/Public/UCD/latest/ucd/UnicodeData.txt"
+
+# Binary range cache layout (all integers little-endian uint32 unless noted):
+#   magic | category count | per category: name length (uint8), name, range count
+#   | one packed (start, end) pair per range, categories in header order.
+_CACHE_MAGIC = b"DSLUCD\x00\x01"
+_CACHE_HEADER = struct.Struct("<8sI")
+_CACHE_CATEGORY = struct.Struct("<I")
+
+
+def _parse_unicode_data(lines: Iterable[str]) -> CategoryRanges:
+    """
+    Streams UnicodeData.txt lines into merged per-category code point ranges.
+
+    Large blocks (CJK ideographs, Hangul syllables, private use areas) are
+    listed in the file as a `<..., First>` / `<..., Last>` pair of lines
+    rather than one line per code point; the pair is expanded to the full
+    range it denotes.
+    """
+    category_ranges: defaultdict[str, list[list[int]]] = defaultdict(list)
+    range_first: Optional[int] = None
+
+    for line in lines:
+        parts = line.split(';', 3)
+        if len(parts) < 3:
+            continue
+        code = int(parts[0], 16)
+        name, category = parts[1], parts[2]
+
+        if name.endswith(', First>'):
+            range_first = code
+            continue
+        start = range_first if name.endswith(', Last>') and range_first is not None else code
+        range_first = None
+
+        ranges = category_ranges[category]
+        if ranges and ranges[-1][1] + 1 >= start:
+            ranges[-1][1] = max(ranges[-1][1], code)
+        else:
+            ranges.append([start, code])
+
+    merged: CategoryRanges = {}
+    for category, ranges in category_ranges.items():
+        # The file is sorted, but don't rely on it: sort and coalesce once more.
+        ranges.sort()
+        result: List[Tuple[int, int]] = []
+        for start, end in ranges:
+            if result and result[-1][1] + 1 >= start:
+                result[-1] = (result[-1][0], max(result[-1][1], end))
+            else:
+                result.append((start, end))
+        merged[category] = result
+    return merged
+
+
+def _read_range_cache(path: str) -> Optional[CategoryRanges]:
+    """Loads a binary range cache written by `_write_range_cache`, or None."""
     try:
-        response = requests.get(url, timeout=10)
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, count = _CACHE_HEADER.unpack_from(mm, 0)
+            if magic != _CACHE_MAGIC:
+                return None
+            offset = _CACHE_HEADER.size
+            header: List[Tuple[str, int]] = []
+            for _ in range(count):
+                name_len = mm[offset]
+                name = mm[offset + 1:offset + 1 + name_len].decode('ascii')
+                offset += 1 + name_len
+                (n_ranges,) = _CACHE_CATEGORY.unpack_from(mm, offset)
+                offset += _CACHE_CATEGORY.size
+                header.append((name, n_ranges))
+
+            values = array('I')
+            values.frombytes(mm[offset:])
+    except (OSError, ValueError, IndexError, struct.error, UnicodeDecodeError):
+        # IndexError: the file ends inside a category's name length byte.
+        return None
+
+    if sys.byteorder != 'little':
+        values.byteswap()
+    if len(values) != 2 * sum(n for _, n in header):
+        return None
+
+    ranges: CategoryRanges = {}
+    pos = 0
+    for name, n_ranges in header:
+        flat = values[pos:pos + 2 * n_ranges]
+        ranges[name] = list(zip(flat[0::2], flat[1::2]))
+        pos += 2 * n_ranges
+    return ranges
+
+
+def _write_range_cache(path: str, ranges: CategoryRanges) -> None:
+    """Atomically persists per-category ranges as packed uint32 pairs."""
+    values = array('I')
+    parts = [_CACHE_HEADER.pack(_CACHE_MAGIC, len(ranges))]
+    for name, category_ranges in ranges.items():
+        encoded = name.encode('ascii')
+        parts.append(bytes([len(encoded)]) + encoded + _CACHE_CATEGORY.pack(len(category_ranges)))
+        for start, end in category_ranges:
+            values.append(start)
+            values.append(end)
+    if sys.byteorder != 'little':
+        values.byteswap()
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(b"".join(parts))
+        f.write(values.tobytes())
+    os.replace(tmp_path, path)
+
+
+def _file_digest(path: str) -> str:
+    """Returns a short content hash identifying a local UnicodeData.txt."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def _download_unicode_data() -> Optional[CategoryRanges]:
+    """Fetches UnicodeData.txt from unicode.org and parses it as it streams in."""
+    # Imported here so hosts working from a local UCD file need no HTTP client.
+    try:
+        import requests
+    except ImportError:
+        logger.error("Error fetching Unicode data: the 'requests' package is not installed")
+        return None
+    try:
+        response = requests.get(UCD_URL, timeout=10, stream=True)
         response.raise_for_status()
+        return _parse_unicode_data(response.iter_lines(decode_unicode=True))
     except requests.exceptions.RequestException as e:
-        print(f"Error fetching Unicode data: {e}")
+        logger.error("Error fetching Unicode data: %s", e)
+        return None
+
+
+def load_category_ranges(ucd_path: Optional[str] = None,
+                         ucd_version: Optional[str] = None,
+                         cache_dir: Optional[str] = None) -> CategoryRanges:
+    """
+    Returns the code point ranges of every General Category, using a local
+    binary cache whenever possible.
+
+    Args:
+        ucd_path: A local UnicodeData.txt. Defaults to the `DSL_PARSER_UCD_PATH`
+                  environment variable; without either, the file is downloaded
+                  once and cached.
+        ucd_version: The key under which the ranges are cached. Defaults to a
+                     content hash of `ucd_path`, or "latest" for downloads.
+        cache_dir: Where cache files live. Defaults to `DSL_PARSER_CACHE_DIR`
+                   or `~/.cache/dsl_parser`.
+
+    Returns:
+        A mapping from category name (e.g. 'Lu') to sorted, disjoint,
+        inclusive (start, end) ranges. Empty if no data source is available.
+    """
+    ucd_path = ucd_path or os.environ.get("DSL_PARSER_UCD_PATH")
+    if ucd_version is None:
+        ucd_version = f"local-{_file_digest(ucd_path)}" if ucd_path else "latest"
+    cache_path = os.path.join(cache_dir or default_cache_dir("ucd"), f"UnicodeData-{ucd_version}.ranges")
+
+    cached = _read_range_cache(cache_path)
+    if cached is not None:
+        return cached
+
+    ranges: Optional[CategoryRanges]
+    if ucd_path:
+        with open(ucd_path, 'r', encoding='utf-8') as f:
+            ranges = _parse_unicode_data(f)
+    else:
+        ranges = _download_unicode_data()
+    if not ranges:
         return {}
 
-    lines = response.text.strip().split('\n')
-    category_map: defaultdict[str, list[int]] = defaultdict(list)
+    try:
+        _write_range_cache(cache_path, ranges)
+    except OSError as e:
+        logger.warning("Could not write Unicode range cache '%s': %s", cache_path, e)
+    return ranges
 
-    for line in lines:
-        parts = line.split(';')
-        if len(parts) > 2:
-            code_point_str, category = parts[0], parts[2]
-            category_map[category].append(int(code_point_str, 16))
-            
-    return category_map
+# Composite rule -> the category rules it is the union of.
+_COMPOSITE_DEFS: Dict[str, List[str]] = {
+    "Letter": ['Lu_chars', 'Ll_chars', 'Lt_chars', 'Lm_chars', 'Lo_chars'],
+    "Mark": ['Mn_chars', 'Mc_chars', 'Me_chars'],
+    "Number": ['Nd_chars', 'Nl_chars', 'No_chars'],
+    "Punctuation": ['Pc_chars', 'Pd_chars', 'Ps_chars', 'Pe_chars', 'Pi_chars', 'Pf_chars', 'Po_chars'],
+    "Symbol": ['Sm_chars', 'Sc_chars', 'Sk_chars', 'So_chars'],
+    "Separator": ['Zs_chars', 'Zl_chars', 'Zp_chars'],
+}
 
-def _build_intermediate_grammar() -> IntermediateGrammar:
-    """Processes raw Unicode data into a structured intermediate dictionary."""
-    category_map = _fetch_and_process_data()
-    if not category_map:
+def _build_intermediate_grammar(symbols: Optional[Iterable[str]] = None, **source) -> IntermediateGrammar:
+    """
+    Processes raw Unicode data into a structured intermediate dictionary.
+
+    With `symbols`, only the composite and category rules named in it are
+    built; the others are never turned into character classes at all.
+    """
+    wanted = None if symbols is None else set(symbols)
+    if wanted is not None and not any(name in _COMPOSITE_DEFS or name.endswith('_chars') for name in wanted):
+        # Nothing Unicode is referenced; don't even load the ranges.
+        return {}
+    category_ranges = load_category_ranges(**source)
+    if not category_ranges:
         return {}
 
-    category_rules: IntermediateGrammar = {}
-    for cat, codes in sorted(category_map.items()):
-        if not codes: continue
-        codes.sort()
-        
-        ranges: List[RangeTuple] = []
-        start = end = codes[0]
-        for code in codes[1:]:
-            if code == end + 1:
-                end = code
-            else:
-                ranges.append(('range', start, end))
-                start = end = code
-        ranges.append(('range', start, end))
+    category_classes: Dict[str, CharClass] = {}
 
-        category_rules[f"{cat}_chars"] = [[r] for r in ranges]
-    
-    composite_defs = {
-        "Letter": ['Lu_chars', 'Ll_chars', 'Lt_chars', 'Lm_chars', 'Lo_chars'],
-        "Mark": ['Mn_chars', 'Mc_chars', 'Me_chars'],
-        "Number": ['Nd_chars', 'Nl_chars', 'No_chars'],
-        "Punctuation": ['Pc_chars', 'Pd_chars', 'Ps_chars', 'Pe_chars', 'Pi_chars', 'Pf_chars', 'Po_chars'],
-        "Symbol": ['Sm_chars', 'Sc_chars', 'Sk_chars', 'So_chars'],
-        "Separator": ['Zs_chars', 'Zl_chars', 'Zp_chars'],
-    }
-    
+    def category_class(rule_name: str) -> Optional[CharClass]:
+        if rule_name not in category_classes:
+            ranges = category_ranges.get(rule_name[:-len('_chars')])
+            if not ranges:
+                return None
+            category_classes[rule_name] = CharClass(ranges)
+        return category_classes[rule_name]
+
+    # Each composite is the union of its categories, so it stays a single
+    # terminal instead of a choice over per-category rules.
     final_grammar: IntermediateGrammar = {}
-    for name, cats in composite_defs.items():
-        final_grammar[name] = [[cat] for cat in cats]
-    
-    final_grammar.update(category_rules)
+    for name, cats in _COMPOSITE_DEFS.items():
+        if wanted is not None and name not in wanted:
+            continue
+        members = [cls for cls in map(category_class, cats) if cls is not None]
+        final_grammar[name] = [[CharClass.union_of(members)]]
+
+    for cat in sorted(category_ranges):
+        rule_name = f"{cat}_chars"
+        if wanted is not None and rule_name not in wanted:
+            continue
+        cls = category_class(rule_name)
+        if cls is not None:
+            final_grammar[rule_name] = [[cls]]
     return final_grammar
 
 def _format_as_ast(grammar: IntermediateGrammar) -> List[ASTNode]:
@@ -82,15 +268,8 @@ def _format_as_ast(grammar: IntermediateGrammar) -> List[ASTNode]:
             sequence_nodes: List[ASTNode] = []
             for symbol in production:
                 node: ASTNode
-                if isinstance(symbol, tuple):
-                    _, p_start, p_end = symbol
-                    if p_start == p_end:
-                        node = ASTNode('HexLiteral', value=f"{p_start:04X}")
-                    else:
-                        node = ASTNode('CharRange', children=[
-                            ASTNode('HexLiteral', value=f"{p_start:04X}"),
-                            ASTNode('HexLiteral', value=f"{p_end:04X}")
-                        ])
+                if isinstance(symbol, CharClass):
+                    node = ASTNode('CharClass', value=symbol)
                     sequence_nodes.append(node)
                 else: 
                     node = ASTNode('Identifier', value=symbol)
@@ -117,21 +296,33 @@ def _format_as_text(grammar: IntermediateGrammar) -> str:
         for production in productions:
             prod_str_parts: List[str] = []
             for symbol in production:
-                if isinstance(symbol, tuple):
-                    _, p_start, p_end = symbol
-                    if p_start == p_end:
-                        prod_str_parts.append(f"#x{p_start:04X}")
-                    else:
-                        prod_str_parts.append(f"[#x{p_start:04X}-#x{p_end:04X}]")
+                if isinstance(symbol, CharClass):
+                    prod_str_parts.append(symbol.to_terminal())
                 else:
                     prod_str_parts.append(symbol)
             body_parts.append(" ".join(prod_str_parts))
         lines.append(f"{name:<18} ::= {' | '.join(body_parts)} ;")
     return "\n".join(lines)
 
-def generate_unicode_ruleset(output_format: str = 'ast') -> Union[List[ASTNode], str, IntermediateGrammar]:
-    """Generates foundational Unicode grammar rules."""
-    intermediate_grammar = _build_intermediate_grammar()
+def generate_unicode_ruleset(output_format: str = 'ast',
+                             ucd_path: Optional[str] = None,
+                             ucd_version: Optional[str] = None,
+                             cache_dir: Optional[str] = None,
+                             symbols: Optional[Iterable[str]] = None) -> Union[List[ASTNode], str, IntermediateGrammar]:
+    """
+    Generates foundational Unicode grammar rules.
+
+    The source arguments are passed through to `load_category_ranges`; after
+    the first run the ranges come from the binary cache without touching the
+    network or re-reading UnicodeData.txt.
+
+    `symbols` limits the output to the composite (`Letter`, `Number`, ...)
+    and category (`Lu_chars`, ...) rules it names, typically the result of
+    `transformer.referenced_symbols` on the user grammar; names that are
+    not Unicode rules are ignored. By default every rule is generated.
+    """
+    intermediate_grammar = _build_intermediate_grammar(
+        symbols, ucd_path=ucd_path, ucd_version=ucd_version, cache_dir=cache_dir)
     
     if output_format == 'ast':
         return _format_as_ast(intermediate_grammar)